@@ -0,0 +1,112 @@
+"""playlist_generator.py çıktı birleştirme süresi: doğrusal taramalı eski döngü ve indeksli build_m3u_lines.
+
+Sentetik kaynaklar üretilir: gruplar, tekrarlanan URL'ler ve isimler,
+geçersiz yayınlar ve varyant URL'si döndüren master playlist'ler. Doğrulama
+sonuçları da sentetiktir, ağ isteği yapılmaz. Her boyutta önce iki yolun
+çıktısının aynı olduğu kontrol edilir. Eski döngü O(girdi x geçerli yayın)
+olduğu için yalnızca --legacy-max boyutuna kadar çalıştırılır.
+
+Kullanım:
+    python benchmarks/assembly_benchmark.py [--sizes 1000 10000 100000] [--legacy-max 10000]
+"""
+import argparse
+import os
+import random
+import sys
+import time
+
+ROOT_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT_DIR)
+
+from playlist_generator import EPG_URL, LOGO_URL, TVG_ID, build_m3u_lines
+
+
+def legacy_build_m3u_lines(entries, valid_streams):
+    """convert_to_m3u'daki eski birleştirme döngüsü (referans)"""
+    current_group = ""
+    m3u_lines = [
+        "#EXTM3U x-tvg-url=\"" + EPG_URL + "\"",
+        "#EXT-X-TVG-URL: " + EPG_URL
+    ]
+    seen_urls = set()
+    for entry in entries:
+        if entry[0] == 'group':
+            current_group = entry[1]
+            m3u_lines.append(f"#EXTINF:-1 tvg-id=\"{TVG_ID}\" group-title=\"{current_group}\",{current_group}")
+            m3u_lines.append("#" + current_group)
+        else:
+            match = next((s for s in valid_streams if s[0]==entry[1] and s[2]==current_group and s[1]==entry[2] and s[1] not in seen_urls), None)
+            if match:
+                seen_urls.add(match[1])
+                m3u_lines.append(f"#EXTINF:-1 tvg-id=\"{TVG_ID}\" tvg-logo=\"{LOGO_URL}\" group-title=\"{current_group}\",{entry[1].split(' ',1)[0] if ' ' in entry[1] else entry[1]}")
+                m3u_lines.append(match[1])
+    return m3u_lines
+
+
+def synthetic_source(rng, size):
+    """(entries, valid_streams) üret; doğrulama sonuçları rastgele sırayla gelir"""
+    entries = []
+    urls = []
+    group = ""
+    for i in range(size):
+        if i % 50 == 0:
+            group = f"Grup {rng.randrange(size // 100 + 1)}"
+            entries.append(('group', group, None))
+        # Tekrarlanan URL ve isimler (aynı kanal birden fazla grupta)
+        if urls and rng.random() < 0.05:
+            url = rng.choice(urls)
+        else:
+            url = f"http://host{rng.randrange(200)}.example/live/{i}.m3u8"
+            urls.append(url)
+        name = f"Kanal {rng.randrange(size // 2 + 1)} HD"
+        entries.append(('stream', name, url, group))
+
+    verdicts = {}
+    for url in urls:
+        roll = rng.random()
+        if roll < 0.6:
+            verdicts[url] = (True, url)
+        elif roll < 0.7:
+            # Master playlist: ilk varyantın URL'si döner
+            verdicts[url] = (True, url.replace(".m3u8", "/720p.m3u8"))
+        else:
+            verdicts[url] = (False, url)
+
+    valid_streams = [
+        (entry[1], verdicts[entry[2]][1], entry[3])
+        for entry in entries if entry[0] == 'stream' and verdicts[entry[2]][0]
+    ]
+    rng.shuffle(valid_streams)
+    return entries, valid_streams
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark indexed playlist assembly against the legacy linear scan")
+    parser.add_argument("--sizes", type=int, nargs="+", default=[1000, 10000, 100000])
+    parser.add_argument("--legacy-max", type=int, default=10000, help="largest size the legacy loop is run on")
+    args = parser.parse_args()
+
+    rng = random.Random(1)
+    print("=== Playlist assembly ===")
+    for size in args.sizes:
+        entries, valid_streams = synthetic_source(rng, size)
+
+        started = time.perf_counter()
+        valid_keys = set(valid_streams)
+        lines = build_m3u_lines(entries, valid_keys)
+        indexed = time.perf_counter() - started
+
+        if size > args.legacy_max:
+            print(f"  {size:>7} entries  legacy {'skipped':>10}  indexed {indexed * 1000:8.1f} ms  ({len(lines)} lines)")
+            continue
+        started = time.perf_counter()
+        legacy_lines = legacy_build_m3u_lines(entries, valid_streams)
+        legacy = time.perf_counter() - started
+        if legacy_lines != lines:
+            print(f"❌ {size} entries: indexed output differs from the legacy loop")
+            sys.exit(1)
+        print(f"  {size:>7} entries  legacy {legacy * 1000:8.1f} ms  indexed {indexed * 1000:8.1f} ms  ({legacy / indexed:.0f}x, same {len(lines)} lines)")
+
+
+if __name__ == "__main__":
+    main()
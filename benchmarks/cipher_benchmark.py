@@ -0,0 +1,137 @@
+"""video_cipher çözücüsünün eski decode_video_url ile karşılaştırması.
+
+Önce eşdeğerlik kontrolü yapılır: rastgele üretilmiş şifreli URL'ler (tüm
+başlangıç pozisyonları, negatif ve taşan pozisyonlar, hatalı girdiler) hem
+Mbltvnet.py / ecanlitvizle-org.py'deki eski uygulamayla hem de yeni
+modülle çözülür ve sonuçlar birebir aynı olmalıdır. Ardından tekil ve toplu
+(decode_many) çözme süreleri ölçülür. Ağ isteği yapılmaz.
+
+Kullanım:
+    python benchmarks/cipher_benchmark.py [URL sayısı] [tekrar sayısı]
+"""
+import os
+import random
+import statistics
+import sys
+import time
+
+ROOT_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT_DIR)
+
+from video_cipher import CIPHER_ALPHABET, DELIMITER, URL_CHARS, decode_many, decode_video_url
+
+
+def legacy_decode_video_url(encrypted_string):
+    """Mbltvnet.py ve ecanlitvizle-org.py'deki eski uygulama (referans)"""
+    delimiter = 'Äx|Xf|x'
+    parts = encrypted_string.split(delimiter)
+
+    if len(parts) < 2:
+        return None
+
+    try:
+        starting_position = int(parts[0])
+    except (ValueError, IndexError):
+        return None
+
+    encrypted_url = parts[1]
+    cipher_alphabet = list(CIPHER_ALPHABET)
+    url_chars = list(URL_CHARS)
+
+    position = starting_position
+    decoded_url = encrypted_url
+    for i in range(len(url_chars)):
+        if position >= len(cipher_alphabet):
+            position = 0
+        cipher_char = cipher_alphabet[position]
+        url_char = url_chars[i]
+        decoded_url = decoded_url.replace(cipher_char, url_char)
+        position += 1
+
+    return decoded_url
+
+
+def legacy_decode_all(values):
+    return [legacy_decode_video_url(value) if DELIMITER in value else value for value in values]
+
+
+def encrypt(url, starting_position):
+    """Test verisi için URL'yi verilen başlangıç pozisyonuyla şifrele"""
+    mapping = {}
+    position = starting_position
+    for url_char in URL_CHARS:
+        if position >= len(CIPHER_ALPHABET):
+            position = 0
+        mapping[url_char] = CIPHER_ALPHABET[position]
+        position += 1
+    return f"{starting_position}{DELIMITER}" + "".join(mapping.get(char, char) for char in url)
+
+
+def random_url(rng):
+    channel = "".join(rng.choice("abcdefghijklmnopqrstuvwxyz-_") for _ in range(rng.randint(4, 16)))
+    token = "".join(rng.choice("0123456789abcdef") for _ in range(32))
+    quality = rng.choice(["360", "480", "720", "1080"])
+    return f"https://cdn{rng.randint(1, 9)}.mobiltv.net/live/{channel}/{quality}.m3u8?st={token}&e={rng.randint(10**9, 2 * 10**9)}"
+
+
+def make_inputs(count, rng):
+    values = [encrypt(random_url(rng), rng.randrange(len(CIPHER_ALPHABET))) for _ in range(count)]
+    # Uç durumlar: taşan ve negatif pozisyonlar, hatalı pozisyon, ayırıcısız
+    # girdi, ekstra ayırıcı ve çözülmemiş karakterler
+    values += [
+        f"{position}{DELIMITER}" + "".join(rng.choice(CIPHER_ALPHABET + URL_CHARS + ("Ü", "x")) for _ in range(60))
+        for position in (35, 36, 99, -1, -17, -35)
+    ]
+    values += [
+        f"abc{DELIMITER}€$Ă",
+        f"{DELIMITER}€$Ă",
+        "https://plain.example/index.m3u8",
+        f"3{DELIMITER}€$Ă{DELIMITER}ignored",
+        f" 7 {DELIMITER}ĂÄË",
+        ""
+    ]
+    return values
+
+
+def check_equivalence(values):
+    legacy = legacy_decode_all(values)
+    current = decode_many(values)
+    mismatches = [value for value, old, new in zip(values, legacy, current) if old != new]
+    for value in values:
+        if DELIMITER in value and legacy_decode_video_url(value) != decode_video_url(value):
+            mismatches.append(value)
+    if mismatches:
+        print(f"❌ {len(mismatches)} mismatches, first: {mismatches[0]!r}")
+        sys.exit(1)
+    print(f"✅ Equivalent on {len(values)} inputs")
+
+
+def measure(function, values, repeat):
+    durations = []
+    for _ in range(repeat):
+        started = time.perf_counter()
+        function(values)
+        durations.append(time.perf_counter() - started)
+    return statistics.median(durations)
+
+
+def main():
+    count = int(sys.argv[1]) if len(sys.argv) > 1 else 10000
+    repeat = int(sys.argv[2]) if len(sys.argv) > 2 else 5
+
+    rng = random.Random(1)
+    values = make_inputs(count, rng)
+    check_equivalence(values)
+
+    print(f"=== Cipher benchmark ({len(values)} URLs, {repeat} runs) ===")
+    legacy = measure(lambda items: [legacy_decode_video_url(item) for item in items], values, repeat)
+    single = measure(lambda items: [decode_video_url(item) for item in items], values, repeat)
+    batch = measure(decode_many, values, repeat)
+    for label, duration in (("legacy", legacy), ("decode_video_url", single), ("decode_many", batch)):
+        print(f"  {label:<17} median {duration * 1000:8.1f} ms  ({duration / len(values) * 1e6:.2f} µs/URL)")
+    print(f"  decode_video_url vs legacy: {legacy / single:.2f}x")
+    print(f"  decode_many vs legacy: {legacy / batch:.2f}x")
+
+
+if __name__ == "__main__":
+    main()
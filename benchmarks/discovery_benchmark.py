@@ -0,0 +1,138 @@
+"""Kanal keşfi ayrıştırma süresi ve bellek karşılaştırması (lxml ve BeautifulSoup).
+
+Mbltvnet.py ve ecanlitvizle-org.py'nin ana sayfa ayrıştırması iki yolla
+ölçülür: yalnızca kanal listesini okuyan lxml yolu ve yedek olarak kalan tam
+BeautifulSoup (html.parser) ağacı. Kayıtlı sayfalar verilebilir; verilmezse
+gerçek sayfalara benzeyen sentetik sayfalar üretilir. Her ölçüm yeni bir
+Python süreci içinde yapılır, böylece tepe bellek (ru_maxrss) ayrıştırmadan
+önceki değerle karşılaştırılabilir. İki yolun sonuçlarının aynı olduğu da
+kontrol edilir. Ağ isteği yapılmaz.
+
+Kullanım:
+    python benchmarks/discovery_benchmark.py [--mobiltv sayfa.html] [--ecanlitvizle sayfa.html] [--repeat 5]
+"""
+import argparse
+import json
+import os
+import random
+import subprocess
+import sys
+import tempfile
+
+ROOT_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# (modül dosyası, hızlı fonksiyon, yedek fonksiyon)
+SITES = {
+    "mobiltv": ("Mbltvnet.py", "parse_channels_fast", "parse_channels_soup"),
+    "ecanlitvizle": ("ecanlitvizle-org.py", "parse_channel_list_fast", "parse_channel_list_soup"),
+}
+
+MEASURE = """
+import importlib.util, json, resource, statistics, sys, time
+path, function_name, page, repeat = sys.argv[1], sys.argv[2], sys.argv[3], int(sys.argv[4])
+spec = importlib.util.spec_from_file_location("site_module", path)
+module = importlib.util.module_from_spec(spec)
+spec.loader.exec_module(module)
+parse = getattr(module, function_name)
+with open(page, "rb") as f:
+    content = f.read()
+baseline = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+durations = []
+for _ in range(repeat):
+    started = time.perf_counter()
+    result = parse(content)
+    durations.append(time.perf_counter() - started)
+peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+print(json.dumps({"median": statistics.median(durations), "peak_kb": peak - baseline, "result": result}))
+"""
+
+
+def filler(rng, count):
+    """Menü, reklam ve script blokları gibi kanal listesi dışındaki içerik"""
+    return "".join(rng.choice([
+        '<div class="widget"><h3>Haber {0}</h3><p>Canl&#305; yay&#305;n &ndash; {0}</p></div>\n',
+        '<script>var ads{0} = {{"slot": "s{0}", "sizes": [[300, 250]]}};</script>\n',
+        '<a href="/kategori/{0}" class="menu-item"><span>Kategori {0}</span></a>\n',
+        '<img src="/img/banner{0}.jpg" alt="banner {0}" loading="lazy">\n',
+    ]).format(rng.randint(0, 10 ** 6)) for _ in range(count))
+
+
+def mobiltv_page(rng, channels=400):
+    items = "".join(
+        f'<li data-adi="Kanal {i} HD" data-url="kanal-{i}"><a href="#"><img src="/logo/{i}.png"> Kanal {i}</a></li>\n'
+        for i in range(channels)
+    )
+    return (
+        "<!DOCTYPE html><html><head><meta charset='utf-8'><title>mobiltv</title></head><body>"
+        + filler(rng, 3000)
+        + '<ul id="tum_kanallar">' + items[:2000] + "</ul>"
+        + filler(rng, 3000)
+        + '<ul id="tum_kanallar">' + items + "</ul>"
+        + filler(rng, 3000)
+        + "</body></html>"
+    )
+
+
+def ecanlitvizle_page(rng, channels=200, pages=15):
+    items = "".join(
+        f'<li><a href="https://tv.ecanlitvizle.org/kanal-{i}/" title="Kanal {i} Canl&#305; &#304;zle">'
+        f'<img src="https://tv.ecanlitvizle.org/logo/{i}.png" alt="Kanal {i}"></a></li>\n'
+        for i in range(channels)
+    )
+    navigation = "".join(f'<a href="https://tv.ecanlitvizle.org/page/{i}/">{i}</a>' for i in range(2, pages + 2))
+    return (
+        "<!DOCTYPE html><html><head><meta charset='utf-8'><title>ecanlitvizle</title></head><body>"
+        + filler(rng, 4000)
+        + '<ul class="kanallar liste">' + items + "</ul>"
+        + f'<div id="navigation">{navigation}</div>'
+        + filler(rng, 4000)
+        + "</body></html>"
+    )
+
+
+def measure(site, function_name, page, repeat):
+    module_path = os.path.join(ROOT_DIR, SITES[site][0])
+    output = subprocess.run(
+        [sys.executable, "-c", MEASURE, module_path, function_name, page, str(repeat)],
+        cwd=ROOT_DIR, check=True, capture_output=True, text=True
+    ).stdout
+    return json.loads(output.strip().splitlines()[-1])
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Compare lxml and BeautifulSoup channel discovery parsing")
+    parser.add_argument("--mobiltv", help="recorded tr.mobiltv.net homepage")
+    parser.add_argument("--ecanlitvizle", help="recorded tv.ecanlitvizle.org homepage")
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+
+    rng = random.Random(1)
+    with tempfile.TemporaryDirectory() as tmp:
+        pages = {}
+        for site, generate in (("mobiltv", mobiltv_page), ("ecanlitvizle", ecanlitvizle_page)):
+            pages[site] = getattr(args, site)
+            if not pages[site]:
+                pages[site] = os.path.join(tmp, f"{site}.html")
+                with open(pages[site], "w", encoding="utf-8") as f:
+                    f.write(generate(rng))
+
+        print(f"=== Discovery parsing ({args.repeat} runs per page, one process per parser) ===")
+        failed = False
+        for site, page in pages.items():
+            _, fast_name, soup_name = SITES[site]
+            fast = measure(site, fast_name, page, args.repeat)
+            soup = measure(site, soup_name, page, args.repeat)
+            size = os.path.getsize(page) / 1e6
+            print(f"  {site:<13} {size:5.2f} MB  html.parser {soup['median'] * 1000:7.1f} ms / {soup['peak_kb'] / 1024:6.1f} MB peak"
+                  f"  lxml {fast['median'] * 1000:7.1f} ms / {fast['peak_kb'] / 1024:6.1f} MB peak  ({soup['median'] / fast['median']:.1f}x)")
+            if fast["result"] is None:
+                print(f"  ⚠️ {site}: lxml path fell back (unexpected page layout)")
+            elif fast["result"] != soup["result"]:
+                print(f"  ❌ {site}: lxml and BeautifulSoup results differ")
+                failed = True
+        if failed:
+            sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,150 @@
+"""site_scraper tek geçişli çıkarıcısının eski unescape + regex döngüsüyle karşılaştırması.
+
+Kayıtlı embed sayfaları argüman olarak verilebilir; verilmezse büyük
+sentetik sayfalar üretilir (uzun script blokları, HTML entity'leri, kalite
+menüsü, changeVideo çağrısı olmayan çok sayıda #kalite bağlantısı gibi
+geri izlemeyi zorlayan durumlar). Her sayfada önce eski ve yeni sonuçların
+birebir aynı olduğu kontrol edilir, ardından süreler ölçülür. Ağ isteği
+yapılmaz.
+
+Kullanım:
+    python benchmarks/extractor_benchmark.py [sayfa.html ...] [--repeat 5]
+"""
+import argparse
+import os
+import random
+import re
+import statistics
+import sys
+import time
+from html import unescape
+
+ROOT_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT_DIR)
+
+from site_scraper import extract_stream_candidates
+
+
+def legacy_extract_file_from_html(html):
+    """Mbltvnet.py ve ecanlitvizle-org.py'deki eski uygulama (referans)"""
+    html = unescape(html)
+    patterns = [
+        r"file\s*:\s*['\"]([^'\"]+)['\"]",
+        r"file\s*:\s*&#039;([^&#039;]+)&#039;",
+        r"file\s*=\s*['\"]([^'\"]+)['\"]",
+        r"'file'\s*:\s*['\"]([^'\"]+)['\"]",
+        r'"file"\s*:\s*["\']([^"\']+)["\']',
+    ]
+    for pattern in patterns:
+        match = re.search(pattern, html, re.IGNORECASE)
+        if match:
+            return match.group(1).strip()
+    return None
+
+
+def legacy_extract_quality_options(html):
+    """Mbltvnet.py ve ecanlitvizle-org.py'deki eski uygulama (referans)"""
+    html = unescape(html)
+    qualities = {}
+    pattern = r'["\']#kalite(\d+)["\'].*?changeVideo\(["\']([^"\']+)["\']\)'
+    for match in re.findall(pattern, html, re.DOTALL):
+        qualities[match[0]] = match[1].strip()
+    return qualities
+
+
+def legacy_extract(html):
+    return legacy_extract_file_from_html(html), legacy_extract_quality_options(html)
+
+
+def filler(rng, size):
+    """Gerçek sayfalara benzeyen, eşleşme içermeyen HTML/JS dolgu"""
+    chunks = []
+    length = 0
+    while length < size:
+        chunk = rng.choice([
+            '<div class="row"><a href="/kanal/{0}" title="Kanal {0} &amp; HD">Kanal {0}</a></div>\n',
+            '<script>var profile{0} = {{"name": "k{0}", "profile": &quot;x{0}&quot;, "files": []}};</script>\n',
+            '<p>Canl&#305; yay&#305;n &ndash; &#039;izle&#039; {0}</p>\n',
+            '<img src="/img/{0}.png" alt="logo {0}" data-file-id="{0}">\n',
+            '<li data-adi="K{0}" data-url="k{0}"><span>&nbsp;{0}</span></li>\n',
+        ]).format(rng.randint(0, 10 ** 6))
+        chunks.append(chunk)
+        length += len(chunk)
+    return "".join(chunks)
+
+
+def quality_menu(rng, escaped):
+    quote = "&#39;" if escaped else "'"
+    items = []
+    for resolution in rng.sample(["1080", "720", "480", "360"], rng.randint(1, 4)):
+        encoded = f"{rng.randrange(35)}Äx|Xf|x" + "".join(rng.choice("€$ĂÄËĢḨĶḼŅ") for _ in range(80))
+        items.append(f'<a class="q" href="#kalite{resolution}" onclick="changeVideo({quote}{encoded}{quote})">{resolution}p</a>')
+    return "\n".join(items)
+
+
+def make_pages(rng):
+    pages = {}
+    pages["quality-2MB"] = filler(rng, 1_000_000) + quality_menu(rng, False) + filler(rng, 1_000_000)
+    pages["quality-escaped-2MB"] = filler(rng, 1_000_000) + quality_menu(rng, True) + filler(rng, 1_000_000)
+    pages["file-2MB"] = filler(rng, 1_500_000) + "<script>jwplayer('p').setup({file: 'https://x.mobiltv.net/live/a.m3u8?t=1&amp;e=2'});</script>" + filler(rng, 500_000)
+    pages["file-double-escaped-2MB"] = filler(rng, 1_000_000) + "file: &amp;#039;https://x/c.m3u8&amp;#039;" + filler(rng, 1_000_000)
+    pages["file-json-escaped-2MB"] = filler(rng, 1_000_000) + "&quot;file&quot;: &quot;https://x/b.m3u8&quot;" + filler(rng, 1_000_000)
+    # Çok sayıda #kalite bağlantısı ama hiç changeVideo çağrısı yok: eski desen her bağlantıdan sayfa sonuna kadar tarar
+    pages["kalite-no-video-200KB"] = "".join(f"<a href='#kalite{i}'>{i}</a>" + filler(rng, 100) for i in range(1000))
+    pages["empty-2MB"] = filler(rng, 2_000_000)
+    return pages
+
+
+def fuzz_pages(rng, count):
+    """Eşdeğerlik için küçük, rastgele ve bozuk parçalardan oluşan sayfalar"""
+    parts = ["'", '"', "&#39;", "&#039;", "&quot;", "&quot", "&#x27;", "&#34;", "&amp;", "&apos;",
+             "file", "FILE", "File", ":", "=", " ", "\n", "#kalite", "720", "480", "changeVideo(", ")", "abc", "Äx|Xf|x",
+             "'file'", '"file"', "x&y", "&lt;", "&#391;", "&#x272;"]
+    return [
+        "".join(rng.choice(parts) for _ in range(rng.randint(1, 60)))
+        for _ in range(count)
+    ]
+
+
+def measure(function, html, repeat):
+    durations = []
+    for _ in range(repeat):
+        started = time.perf_counter()
+        function(html)
+        durations.append(time.perf_counter() - started)
+    return statistics.median(durations)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Compare the single-pass stream extractor with the legacy one")
+    parser.add_argument("pages", nargs="*", help="recorded embed pages (default: synthetic pages)")
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+
+    rng = random.Random(1)
+    if args.pages:
+        pages = {}
+        for path in args.pages:
+            with open(path, "r", encoding="utf-8", errors="replace") as f:
+                pages[os.path.basename(path)] = f.read()
+    else:
+        pages = make_pages(rng)
+
+    fuzz = fuzz_pages(rng, 20000)
+    mismatches = [html for html in list(pages.values()) + fuzz if legacy_extract(html) != extract_stream_candidates(html)]
+    if mismatches:
+        print(f"❌ {len(mismatches)} mismatches, first: {mismatches[0][:200]!r}")
+        print(f"   legacy:      {legacy_extract(mismatches[0])}")
+        print(f"   single-pass: {extract_stream_candidates(mismatches[0])}")
+        sys.exit(1)
+    print(f"✅ Same output on {len(pages)} pages and {len(fuzz)} fuzzed snippets")
+
+    print(f"=== Extractor benchmark ({args.repeat} runs per page) ===")
+    for name, html in pages.items():
+        legacy = measure(legacy_extract, html, args.repeat)
+        single = measure(extract_stream_candidates, html, args.repeat)
+        print(f"  {name:<24} {len(html) / 1e6:5.2f} MB  legacy {legacy * 1000:8.1f} ms  single-pass {single * 1000:8.1f} ms  ({legacy / single:.1f}x)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,83 @@
+"""main.py başlangıç süresi karşılaştırması.
+
+Her ölçüm yeni bir Python süreci içinde yapılır (GitHub runner'daki soğuk
+başlangıç gibi): oturum oluşturulur ve config'teki tüm kanal URL'leri
+eklentilere çözülür. Ağ isteği yapılmaz.
+
+Kullanım:
+    python benchmarks/startup_benchmark.py [config.json] [tekrar sayısı]
+"""
+import json
+import os
+import statistics
+import subprocess
+import sys
+import time
+
+ROOT_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+MODES = {
+    # Eski davranış: her kanal için streamlink.streams() -> yeni Streamlink() oturumu
+    "per-channel": """
+import json, sys
+from streamlink.session import Streamlink
+from streamlink_session import channel_urls
+for channel in json.load(open(sys.argv[1], encoding="utf-8"))["channels"]:
+    for url in channel_urls(channel):
+        Streamlink().resolve_url(url)
+""",
+    # Paylaşılan oturum, Streamlink'in tüm eklenti dizini
+    "shared": """
+import json, sys
+from streamlink_session import SessionManager, channel_urls
+channels = json.load(open(sys.argv[1], encoding="utf-8"))["channels"]
+manager = SessionManager.for_channels(channels, lazy_plugins=False)
+for channel in channels:
+    for url in channel_urls(channel):
+        manager.resolve_url(url)
+""",
+    # Paylaşılan oturum, sadece config'in ihtiyaç duyduğu eklentiler
+    "lazy": """
+import json, sys
+from streamlink_session import SessionManager, channel_urls
+channels = json.load(open(sys.argv[1], encoding="utf-8"))["channels"]
+manager = SessionManager.for_channels(channels, lazy_plugins=True)
+for channel in channels:
+    for url in channel_urls(channel):
+        manager.resolve_url(url)
+"""
+}
+
+
+def run_once(code, config_file):
+    started = time.perf_counter()
+    subprocess.run(
+        [sys.executable, "-c", code, config_file],
+        cwd=ROOT_DIR,
+        check=True
+    )
+    return time.perf_counter() - started
+
+
+def main():
+    config_file = os.path.abspath(sys.argv[1] if len(sys.argv) > 1 else os.path.join(ROOT_DIR, "config.json"))
+    repeat = int(sys.argv[2]) if len(sys.argv) > 2 else 5
+
+    with open(config_file, "r", encoding="utf-8") as f:
+        channel_count = len(json.load(f)["channels"])
+
+    print(f"=== Startup benchmark ({channel_count} channels, {repeat} runs per mode) ===")
+    results = {}
+    for mode, code in MODES.items():
+        durations = [run_once(code, config_file) for _ in range(repeat)]
+        results[mode] = statistics.median(durations)
+        print(f"  {mode:<12} median {results[mode] * 1000:8.1f} ms  (min {min(durations) * 1000:.1f} ms)")
+
+    baseline = results["per-channel"]
+    for mode, duration in results.items():
+        if mode != "per-channel":
+            print(f"  {mode} vs per-channel: {baseline / duration:.2f}x")
+
+
+if __name__ == "__main__":
+    main()
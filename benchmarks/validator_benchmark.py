@@ -0,0 +1,263 @@
+"""playlist_generator.py yayın doğrulayıcısı: eski thread'li check_stream ile asyncio karşılaştırması.
+
+Yerel bir HTTP sunucusu gerçek kaynaklardaki durumları taklit eder (geçerli
+ve bozuk m3u8, HEAD'e izin vermeyen sunucu, master playlist, yönlendirme,
+doğrudan video, yanlış Content-Type, boş gövde, zaman aşımı, kapalı port).
+Önce her URL için eski kodla "full" modun kararlarının aynı olduğu kontrol
+edilir ("budget" modun farkları listelenir), ardından her yanıta gecikme
+eklenerek çok sayıda URL'de süreler ve okunan baytlar ölçülür.
+URL'ler 127.0.0.x adresleri üzerinden birkaç host'a dağıtılır. Son olarak
+bağlantıyı kabul edip hiç yanıt vermeyen bir host'a (çökmüş CDN) yönelen
+URL'lerle devre kesicili ve kesicisiz süreler karşılaştırılır. Dış ağa
+istek yapılmaz.
+
+Kullanım:
+    python benchmarks/validator_benchmark.py [--urls 2000] [--latency 0.03] [--hosts 8] [--dead-urls 300]
+"""
+import argparse
+import asyncio
+import os
+import re
+import socket
+import sys
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import urljoin, urlparse
+
+import requests
+import urllib3
+
+ROOT_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT_DIR)
+
+from stream_validator import HostHealth, StreamValidator
+
+urllib3.disable_warnings(urllib3.exceptions.InsecureRequestWarning)
+
+TIMEOUT = 1
+LATENCY = 0.0
+
+PLAYLIST = b"#EXTM3U\n#EXT-X-TARGETDURATION:6\n#EXTINF:6,\nseg1.ts\n"
+LONG_PLAYLIST = b"#EXTM3U\n#EXT-X-TARGETDURATION:6\n" + b"".join(b"#EXTINF:6.000,\nsegment_%06d.ts\n" for i in range(3000))
+BIG_MASTER = b"#EXTM3U\n" + b"".join(
+    b'#EXT-X-MEDIA:TYPE=AUDIO,GROUP-ID="aac",NAME="audio%d",URI="a/audio%d.m3u8"\n' % (i, i) for i in range(20)
+) + b"".join(b"#EXT-X-STREAM-INF:BANDWIDTH=%d,RESOLUTION=1280x720\nv/ok.m3u8\n" % (800000 + i) for i in range(40))
+
+# yol -> (durum, Content-Type, gövde, HEAD durumu, ek başlıklar)
+CASES = {
+    "/ok.m3u8": (200, "application/vnd.apple.mpegurl", PLAYLIST, 200, {}),
+    "/nohead.m3u8": (200, "application/vnd.apple.mpegurl", PLAYLIST, 405, {}),
+    "/html.m3u8": (200, "text/html", b"<html>not a playlist</html>", 200, {}),
+    "/gone.m3u8": (404, "text/html", b"not found", 404, {}),
+    "/master.m3u8": (200, "application/vnd.apple.mpegurl",
+                     b"#EXTM3U\n#EXT-X-STREAM-INF:BANDWIDTH=800000\nv/ok.m3u8\n", 200, {}),
+    "/master-dead.m3u8": (200, "application/vnd.apple.mpegurl",
+                          b"#EXTM3U\n#EXT-X-STREAM-INF:BANDWIDTH=800000\nv/gone.m3u8\n", 200, {}),
+    "/master-novariant.m3u8": (200, "application/vnd.apple.mpegurl",
+                               b"#EXTM3U\n#EXT-X-STREAM-INF:BANDWIDTH=800000\nv/chunk.ts\n", 200, {}),
+    "/long.m3u8": (200, "application/vnd.apple.mpegurl", LONG_PLAYLIST, 200, {}),
+    "/big-master.m3u8": (200, "application/vnd.apple.mpegurl", BIG_MASTER, 200, {}),
+    "/list.m3u": (200, "audio/x-mpegurl", PLAYLIST, 200, {}),
+    "/redirect.m3u8": (302, "text/html", b"", 302, {"Location": "/ok.m3u8"}),
+    "/video.mp4": (206, "video/mp4", b"\x00" * 2048, 200, {}),
+    "/audio.aac": (200, "audio/aac", b"\xff" * 512, 200, {}),
+    "/page.ts": (200, "text/html", b"<html></html>", 200, {}),
+    "/empty.ts": (200, "video/mp2t", b"", 200, {}),
+    "/missing.ts": (404, "video/mp2t", b"x", 404, {}),
+    "/slow.ts": (200, "video/mp2t", b"x" * 100, 200, {}),
+}
+
+
+class Server(ThreadingHTTPServer):
+    daemon_threads = True
+    # Varsayılan kuyruk (5) eşzamanlı bağlantılarda SYN'leri düşürüp sahte zaman aşımlarına yol açar
+    request_queue_size = 4096
+
+
+class Handler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+
+    def respond(self, include_body):
+        time.sleep(LATENCY)
+        path = urlparse(self.path).path
+        # /v/ok.m3u8 (varyant) ve /123/ok.m3u8 (ölçümdeki farklı URL'ler) aynı durumdur
+        key = "/" + path.rsplit("/", 1)[-1]
+        status, content_type, body, head_status, headers = CASES.get(key, (404, "text/html", b"", 404, {}))
+        if key == "/slow.ts":
+            time.sleep(TIMEOUT * 2)
+        self.send_response(status if include_body else head_status)
+        self.send_header("Content-Type", content_type)
+        self.send_header("Content-Length", str(len(body)))
+        for name, value in headers.items():
+            self.send_header(name, value)
+        if self.headers.get("Connection", "").lower() == "close":
+            # Gerçek sunucular gibi bildir; yoksa istemci kapanan bağlantıyı yeniden kullanmaya çalışır
+            self.send_header("Connection", "close")
+        self.end_headers()
+        if include_body:
+            self.wfile.write(body)
+
+    def do_GET(self):
+        self.respond(True)
+
+    def do_HEAD(self):
+        self.respond(False)
+
+    def log_message(self, *args):
+        pass
+
+
+# -----------------------------
+# Eski uygulama (referans)
+# -----------------------------
+url_cache = {}
+
+def legacy_check_stream(url, timeout=8, max_attempts=1):
+    if url in url_cache:
+        return url_cache[url]
+
+    headers = {
+        'User-Agent': 'Mozilla/5.0',
+        'Accept': '*/*',
+        'Connection': 'close',
+        'Referer': 'https://www.google.com/'
+    }
+
+    for attempt in range(max_attempts):
+        try:
+            if url.endswith(('.m3u8', '.m3u')):
+                response = requests.head(url, headers=headers, timeout=timeout, allow_redirects=True, verify=False)
+                if response.status_code != 200:
+                    return False, url
+                if url.endswith('.m3u8'):
+                    response = requests.get(url, headers=headers, timeout=timeout, verify=False)
+                    if response.status_code == 200 and '#EXTM3U' in response.text:
+                        if '#EXT-X-STREAM-INF' in response.text:
+                            variants = re.findall(r'\n([^\n\.]+\.m3u8[^\n]*)', response.text)
+                            if variants:
+                                variant_url = variants[0]
+                                if not variant_url.startswith('http'):
+                                    variant_url = urljoin(url, variant_url)
+                                return legacy_check_stream(variant_url, timeout, 1)
+                        return True, url
+                    else:
+                        return False, url
+            else:
+                range_headers = headers.copy()
+                range_headers['Range'] = 'bytes=0-1024'
+                with requests.get(url, headers=range_headers, timeout=timeout, stream=True, verify=False) as response:
+                    if response.status_code in (200, 206):
+                        chunk = next(response.iter_content(chunk_size=1024), None)
+                        if not chunk:
+                            return False, url
+                        content_type = response.headers.get('Content-Type', '').lower()
+                        if not any(x in content_type for x in ['video/', 'audio/', 'application/octet-stream', 'application/vnd.apple.mpegurl']):
+                            return False, url
+                        url_cache[url] = (True, url)
+                        return True, url
+        except Exception:
+            if attempt == max_attempts - 1:
+                return False, url
+            time.sleep(1)
+    return False, url
+
+
+def legacy_validate(urls, max_workers=20):
+    with ThreadPoolExecutor(max_workers=max_workers) as executor:
+        return dict(zip(urls, executor.map(lambda url: legacy_check_stream(url, TIMEOUT), urls)))
+
+
+def validate(urls, probe_mode, rate, hosts=None):
+    validator = StreamValidator(timeout=TIMEOUT, rate=rate, probe_mode=probe_mode, hosts=hosts)
+    return asyncio.run(validator.validate(urls)), validator
+
+
+def dead_host():
+    """Bağlantıyı kabul eden (çekirdek kuyruğu) ama hiç yanıt vermeyen host"""
+    sock = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
+    sock.bind(("127.0.0.200", 0))
+    sock.listen(4096)
+    return sock, f"http://127.0.0.200:{sock.getsockname()[1]}"
+
+
+def main():
+    global LATENCY
+    parser = argparse.ArgumentParser(description="Compare the asyncio stream validator with the legacy thread pool")
+    parser.add_argument("--urls", type=int, default=2000)
+    parser.add_argument("--latency", type=float, default=0.03, help="seconds added to every response")
+    parser.add_argument("--hosts", type=int, default=8, help="number of 127.0.0.x hosts")
+    parser.add_argument("--rate", type=float, default=0, help="global request rate limit of the asyncio validator (0: none)")
+    parser.add_argument("--dead-urls", type=int, default=300, help="URLs on a host that never responds (0: skip)")
+    args = parser.parse_args()
+
+    server = Server(("0.0.0.0", 0), Handler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    port = server.server_address[1]
+    hosts = [f"http://127.0.0.{i + 1}:{port}" for i in range(args.hosts)]
+
+    # Kararların aynı olduğunu kontrol et
+    case_urls = [f"{hosts[0]}{path}" for path in CASES] + ["http://127.0.0.1:1/closed.m3u8", "http://127.0.0.1:1/closed.ts"]
+    legacy = legacy_validate(case_urls)
+    full, _ = validate(case_urls, "full", args.rate)
+    budget, _ = validate(case_urls, "budget", args.rate)
+    for url in case_urls:
+        note = "" if budget[url][0] == legacy[url][0] else f"  (budget: {'✓' if budget[url][0] else '✗'})"
+        print(f"  {'✓' if full[url][0] else '✗'} {url.replace(hosts[0], '')}{note}")
+    mismatches = [url for url in case_urls if legacy[url] != full[url]]
+    if mismatches:
+        for url in mismatches:
+            print(f"❌ {url}: legacy {legacy[url]}, asyncio {full[url]}")
+        sys.exit(1)
+    print(f"✅ Same verdicts on {len(case_urls)} cases (full probes)")
+
+    # Süre ölçümü: slow.ts dışındaki durumlar, birkaç host'a dağıtılmış
+    LATENCY = args.latency
+    paths = [path for path in CASES if path != "/slow.ts"]
+    urls = [f"{hosts[i % len(hosts)]}/{i}{paths[i % len(paths)]}" for i in range(args.urls)]
+    url_cache.clear()
+    print(f"=== Validating {len(urls)} URLs on {len(hosts)} hosts ({args.latency * 1000:.0f} ms latency per response) ===")
+    started = time.perf_counter()
+    legacy = legacy_validate(urls)
+    legacy_time = time.perf_counter() - started
+    print(f"  legacy (20 threads, new connection per request)  {legacy_time:6.2f} s")
+    for mode in ("full", "budget"):
+        started = time.perf_counter()
+        current, validator = validate(urls, mode, args.rate)
+        elapsed = time.perf_counter() - started
+        same = sum(legacy[url][0] == current[url][0] for url in urls)
+        probes = validator.stats["miss"]
+        print(f"  asyncio, {mode:<6} probes (keep-alive pools)      {elapsed:6.2f} s  ({legacy_time / elapsed:.1f}x)"
+              f"  {validator.stats['bytes'] / 1e6:6.2f} MB read, {validator.stats['bytes'] / probes:6.0f} B per probe"
+              f"  same verdict on {same}/{len(urls)}")
+        if mode == "full":
+            # Yük altındaki farklar yerel sunucudaki bağlantı hatalarından kaynaklanabilir
+            for url in [url for url in urls if legacy[url] != current[url]][:5]:
+                print(f"  ⚠️ {url}: legacy {legacy[url]}, asyncio {current[url]}")
+
+    # Çökmüş host: canlı host'lardaki URL'lerle karışık
+    if args.dead_urls:
+        sock, dead = dead_host()
+        live_urls = urls[:args.dead_urls]
+        dead_urls = [f"{dead}/{i}/live.m3u8" for i in range(args.dead_urls)]
+        mixed = [url for pair in zip(live_urls, dead_urls) for url in pair]
+        print(f"=== {len(dead_urls)} URLs on a host that never responds, mixed with {len(live_urls)} live URLs "
+              f"(timeout {TIMEOUT} s) ===")
+        for label, health in (("no breaker", None), ("breaker", HostHealth(state_file=None, max_timeout=TIMEOUT))):
+            started = time.perf_counter()
+            current, _ = validate(mixed, "full", args.rate, health)
+            elapsed = time.perf_counter() - started
+            same = sum(legacy[url][0] == current[url][0] for url in live_urls)
+            note = ""
+            if health is not None:
+                note = (f"  {health.stats['short_circuited']} requests skipped, {health.stats['trials']} trials,"
+                        f" open: {', '.join(health.open_hosts())}")
+            print(f"  {label:<10} {elapsed:6.2f} s  valid on dead host: {sum(current[url][0] for url in dead_urls)}"
+                  f"  same verdict on {same}/{len(live_urls)} live URLs{note}")
+        sock.close()
+    server.shutdown()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,58 @@
+import random
+import time
+
+from state_file import load_state, save_state
+
+
+class ChannelHealth:
+    """Sürekli başarısız olan kanallar için kalıcı, üstel geri çekilme (backoff) durumu.
+
+    Durum JSON dosyasında ``{slug: {"failures", "next_attempt_at", "last_error"}}``
+    şeklinde saklanır. ``threshold`` kadar art arda hatadan sonra kanal
+    ``base_delay * 2^n`` saniye (±``jitter`` oranında rastgele, en fazla
+    ``max_delay``) atlanır; ilk başarılı çözümlemede kayıt silinir.
+    """
+
+    def __init__(self, state_file, base_delay=3600, max_delay=86400, jitter=0.2, threshold=2):
+        self.state_file = state_file
+        self.base_delay = base_delay
+        self.max_delay = max_delay
+        self.jitter = jitter
+        self.threshold = threshold
+        self.state = load_state(state_file, "health state")
+
+    def save(self):
+        save_state(self.state_file, self.state)
+
+    def in_backoff(self, slug, now=None):
+        entry = self.state.get(slug)
+        if not entry:
+            return False
+        now = time.time() if now is None else now
+        return entry.get("next_attempt_at", 0) > now
+
+    def next_attempt_at(self, slug):
+        """Geri çekilmedeki kanalın yeniden denenebileceği zaman (kaydı yoksa 0)"""
+        return (self.state.get(slug) or {}).get("next_attempt_at", 0)
+
+    def backoff_delay(self, failures):
+        """Art arda hata sayısına göre bekleme süresi (jitter dahil)"""
+        if failures < self.threshold:
+            return 0
+        delay = self.base_delay * 2 ** (failures - self.threshold)
+        # Jitter önce uygulanır ki sonuç max_delay'i aşmasın
+        return min(self.max_delay, delay * random.uniform(1 - self.jitter, 1 + self.jitter))
+
+    def record_failure(self, slug, reason, now=None):
+        now = time.time() if now is None else now
+        entry = self.state.get(slug, {})
+        failures = entry.get("failures", 0) + 1
+        self.state[slug] = {
+            "failures": failures,
+            "next_attempt_at": int(now + self.backoff_delay(failures)),
+            "last_error": reason
+        }
+        return self.state[slug]
+
+    def record_success(self, slug):
+        self.state.pop(slug, None)
@@ -0,0 +1,148 @@
+import os
+import re
+from urllib.parse import urlparse
+
+from streamlink_session import channel_urls
+
+TWITCH_GQL_ENDPOINT = "https://gql.twitch.tv/gql"
+# Twitch web oynatıcısının herkese açık client-id'si (Streamlink de bunu kullanır)
+TWITCH_CLIENT_ID = "kimne78kx3ncx6brgo4mv6wki5h1ko"
+TWITCH_BATCH_SIZE = 100
+TWITCH_LIVE_QUERY = "query($logins: [String!]) { users(logins: $logins) { login stream { id } } }"
+
+# Kick'in resmi public API'si; birden fazla "slug" parametresi kabul eder ve token ister
+KICK_CHANNELS_ENDPOINT = "https://api.kick.com/public/v1/channels"
+KICK_BATCH_SIZE = 50
+
+TWITCH_CHANNEL_RE = re.compile(r"^/(?P<login>[A-Za-z0-9_]+)/?$")
+KICK_CHANNEL_RE = re.compile(r"^/(?P<slug>[A-Za-z0-9_-]+)/?$")
+
+
+def twitch_login(url):
+    """twitch.tv/<login> URL'sinden login adını çıkar (video/clip URL'leri için None)"""
+    parsed = urlparse(url)
+    host = (parsed.hostname or "").lower()
+    if (host != "twitch.tv" and not host.endswith(".twitch.tv")) or host.startswith("clips."):
+        return None
+    match = TWITCH_CHANNEL_RE.match(parsed.path)
+    return match.group("login").lower() if match else None
+
+
+def kick_slug(url):
+    """kick.com/<slug> URL'sinden kanal adını çıkar"""
+    parsed = urlparse(url)
+    host = (parsed.hostname or "").lower()
+    if host != "kick.com" and not host.endswith(".kick.com"):
+        return None
+    match = KICK_CHANNEL_RE.match(parsed.path)
+    return match.group("slug").lower() if match else None
+
+
+def _batches(items, size):
+    for start in range(0, len(items), size):
+        yield items[start:start + size]
+
+
+class LivePrecheck:
+    """Twitch ve Kick kanallarının yayın durumunu toplu isteklerle kontrol eder.
+
+    Sonuç ``{slug: True | False | None}`` şeklindedir; ``None`` durumu
+    bilinmiyor demektir ve kanal her zamanki gibi Streamlink'e gönderilir.
+    Endpoint'ler config'ten değiştirilebilir (ör. yerel bir test sunucusu).
+    """
+
+    def __init__(self, http, twitch_endpoint=TWITCH_GQL_ENDPOINT, twitch_client_id=TWITCH_CLIENT_ID,
+                 kick_endpoint=KICK_CHANNELS_ENDPOINT, kick_token=None, timeout=10):
+        self.http = http
+        self.twitch_endpoint = twitch_endpoint
+        self.twitch_client_id = twitch_client_id
+        self.kick_endpoint = kick_endpoint
+        self.kick_token = kick_token
+        self.timeout = timeout
+
+    @classmethod
+    def from_config(cls, http, precheck_config):
+        return cls(
+            http,
+            twitch_endpoint=precheck_config.get("twitchEndpoint", TWITCH_GQL_ENDPOINT),
+            twitch_client_id=precheck_config.get("twitchClientId", TWITCH_CLIENT_ID),
+            kick_endpoint=precheck_config.get("kickEndpoint", KICK_CHANNELS_ENDPOINT),
+            kick_token=os.getenv(precheck_config.get("kickTokenEnv", "KICK_API_TOKEN")),
+            timeout=int(precheck_config.get("timeout", 10))
+        )
+
+    def check_twitch(self, logins):
+        """login -> canlı mı; yanıtta olmayan login'ler sonuçta yer almaz"""
+        live = {}
+        for batch in _batches(sorted(set(logins)), TWITCH_BATCH_SIZE):
+            response = self.http.post(
+                self.twitch_endpoint,
+                json={"query": TWITCH_LIVE_QUERY, "variables": {"logins": batch}},
+                headers={"Client-ID": self.twitch_client_id},
+                timeout=self.timeout
+            )
+            response.raise_for_status()
+            for user in (response.json().get("data") or {}).get("users") or []:
+                if user and user.get("login"):
+                    live[user["login"].lower()] = user.get("stream") is not None
+        return live
+
+    def check_kick(self, slugs):
+        """slug -> canlı mı; token yoksa boş sözlük döner (durum bilinmiyor)"""
+        live = {}
+        if not self.kick_token:
+            return live
+        for batch in _batches(sorted(set(slugs)), KICK_BATCH_SIZE):
+            response = self.http.get(
+                self.kick_endpoint,
+                params=[("slug", slug) for slug in batch],
+                headers={"Authorization": f"Bearer {self.kick_token}", "Accept": "application/json"},
+                timeout=self.timeout
+            )
+            response.raise_for_status()
+            for channel in response.json().get("data") or []:
+                if channel and channel.get("slug"):
+                    live[channel["slug"].lower()] = bool((channel.get("stream") or {}).get("is_live"))
+        return live
+
+    def check(self, channels):
+        """Kanal listesinin yayın durumunu slug bazında döndür.
+
+        Birden fazla kaynağı olan kanal, kaynaklardan biri canlıysa canlı,
+        hepsi çevrimdışıysa çevrimdışı sayılır; aksi halde durum bilinmiyor.
+        """
+        twitch_logins = {}
+        kick_slugs = {}
+        for channel in channels:
+            for url in channel_urls(channel):
+                if twitch_login(url):
+                    twitch_logins[url] = twitch_login(url)
+                elif kick_slug(url):
+                    kick_slugs[url] = kick_slug(url)
+
+        url_status = {}
+        for platform, checker, mapping in (
+            ("Twitch", self.check_twitch, twitch_logins),
+            ("Kick", self.check_kick, kick_slugs)
+        ):
+            if not mapping:
+                continue
+            try:
+                live = checker(list(mapping.values()))
+            except Exception as e:
+                # Precheck başarısızsa kanallar elenmez, Streamlink'e gider
+                print(f"⚠️  {platform} live precheck failed: {e}")
+                continue
+            for url, name in mapping.items():
+                url_status[url] = live.get(name)
+
+        status = {}
+        for channel in channels:
+            statuses = [url_status.get(url) for url in channel_urls(channel)]
+            if any(is_live is True for is_live in statuses):
+                status[channel.get("slug", "unknown")] = True
+            elif statuses and all(is_live is False for is_live in statuses):
+                status[channel.get("slug", "unknown")] = False
+            else:
+                status[channel.get("slug", "unknown")] = None
+        return status
@@ -1,8 +1,34 @@
-import streamlink
 import sys
 import os 
 import json
 import traceback
+import threading
+import time
+import argparse
+import re
+import contextlib
+from concurrent.futures import FIRST_COMPLETED, Future, as_completed, wait
+from urllib.parse import urljoin, urlparse
+
+from channel_health import ChannelHealth
+from live_precheck import LivePrecheck
+from refresh_scheduler import RefreshScheduler
+from source_state import SourceState
+from streamlink_session import SessionManager, channel_urls
+
+# Profil adı olarak kullanılamayacak playlist ve sonuç anahtarları
+RESERVED_PLAYLIST_NAMES = ("master", "best", "ll", "expiry_urls", "source", "elapsed")
+
+# Varsayılan host limitleri (config.json içindeki "hostLimits" ile değiştirilebilir)
+DEFAULT_HOST_LIMITS = {
+    "twitch.tv": 4,
+    "kick.com": 2
+}
+# Yarışta son kazanan kaynağın diğerlerinden önce tek başına çalıştığı süre (saniye)
+RACE_HEAD_START = 2.0
+DEFAULT_REFRESH_STATE_FILE = os.path.join("state", "refresh.json")
+DEFAULT_HEALTH_STATE_FILE = os.path.join("state", "health.json")
+DEFAULT_SOURCE_STATE_FILE = os.path.join("state", "sources.json")
 
 def info_to_text(stream_info, url):
     text = '#EXT-X-STREAM-INF:'
@@ -72,6 +98,85 @@ def create_best_playlist(playlists, multivariant):
     
     return best_text
 
+def load_profiles(config):
+    """config'teki "profiles" bölümünü doğrula; isim -> filtre sözlüğü döndür.
+
+    Örnek: ``{"sd": {"maxHeight": 480}, "mobile": {"maxBandwidth": 1500000, "codecs": ["avc1"]}}``.
+    Desteklenen filtreler: minHeight, maxHeight, minBandwidth, maxBandwidth ve
+    codecs (kodek öneki listesi). Klasör adı varsayılan olarak profil adıdır.
+    """
+    profiles = {}
+    for name, profile in config.get("profiles", {}).items():
+        if name in RESERVED_PLAYLIST_NAMES:
+            print(f"⚠️  Profile name '{name}' is reserved, skipping")
+            continue
+        profiles[name] = profile
+    return profiles
+
+def matches_profile(stream_info, profile):
+    """Varyant profilin çözünürlük, bant genişliği ve kodek filtrelerine uyuyor mu"""
+    height = stream_info.resolution.height if stream_info.resolution else 0
+    bandwidth = stream_info.bandwidth or 0
+    if height < profile.get("minHeight", 0) or height > profile.get("maxHeight", height):
+        return False
+    if bandwidth < profile.get("minBandwidth", 0) or bandwidth > profile.get("maxBandwidth", bandwidth):
+        return False
+    codecs = profile.get("codecs")
+    if codecs and not any(codec.startswith(prefix) for codec in stream_info.codecs or [] for prefix in codecs):
+        return False
+    return True
+
+def create_profile_playlists(playlists, multivariant, profiles):
+    """Tüm profilleri aynı çözümlenmiş multivariant'tan tek geçişte üret.
+
+    Varyantlar master playlist'teki gibi bir kez sıralanır; her profil
+    filtresine uyanları aynı sırayla alır. Hiç varyantı kalmayan profil
+    sonuçta yer almaz.
+    """
+    header = '#EXTM3U\n'
+    if multivariant.version:
+        header += f'#EXT-X-VERSION:{multivariant.version}\n'
+
+    # Çözünürlüğe göre sırala (yüksekten düşüğe)
+    sorted_playlists = sorted(
+        [p for p in playlists if p.stream_info.resolution and p.stream_info.video != "audio_only"],
+        key=lambda x: (x.stream_info.resolution.height, x.stream_info.bandwidth or 0),
+        reverse=True
+    )
+
+    texts = {name: header for name in profiles}
+    for playlist in sorted_playlists:
+        variant_text = None
+        for name, profile in profiles.items():
+            if matches_profile(playlist.stream_info, profile):
+                variant_text = variant_text or info_to_text(playlist.stream_info, playlist.uri)
+                texts[name] += variant_text
+    return {name: text for name, text in texts.items() if text != header}
+
+def create_low_latency_playlist(multivariant_text, multivariant_url):
+    """Ham multivariant'tan LL-HLS etiketlerini ve varyant özniteliklerini koruyan playlist oluştur.
+
+    Sadece ses içeren varyantlar çıkarılır, göreli URI'ler mutlak hale getirilir;
+    geri kalan her şey (#EXT-X-TWITCH-INFO, #EXT-X-SERVER-CONTROL, #EXT-X-START,
+    #EXT-X-MEDIA, FRAME-RATE ...) olduğu gibi kalır.
+    """
+    lines = []
+    skip_uri = False
+    for line in multivariant_text.splitlines():
+        line = line.strip()
+        if not line:
+            continue
+        if line.startswith("#"):
+            if line.startswith("#EXT-X-STREAM-INF") and 'VIDEO="audio_only"' in line:
+                skip_uri = True
+                continue
+            lines.append(re.sub(r'URI="([^"]+)"', lambda m: f'URI="{urljoin(multivariant_url, m.group(1))}"', line))
+        elif skip_uri:
+            skip_uri = False
+        else:
+            lines.append(urljoin(multivariant_url, line))
+    return "\n".join(lines) + "\n"
+
 def create_final_m3u_playlist(processed_channels, repo_base_url, master_folder_path):
     """Tüm kanalları içeren tek bir M3U playlist oluştur"""
     m3u_content = '#EXTM3U\n'
@@ -89,20 +194,496 @@ def create_final_m3u_playlist(processed_channels, repo_base_url, master_folder_p
     
     return m3u_content
 
-def main():
-    print("=== Starting stream processing ===")
-    
-    # Loading config file
-    config_file = sys.argv[1] if len(sys.argv) > 1 else "config.json"
+def get_host_key(url, host_limits):
+    """URL'nin hangi host limitine tabi olduğunu bul"""
+    host = (urlparse(url).hostname or "").lower()
+    for limited_host in host_limits:
+        if host == limited_host or host.endswith("." + limited_host):
+            return limited_host
+    return None
+
+class SlotClaim:
+    """Bir grup çağrının aldığı HostLimiter yerleri.
+
+    ``abandon()`` sonrası tutulan yerler hemen geri verilir ve henüz yer
+    bekleyen çağrılar vazgeçer; bırakılan çağrılar host limitinden sayılmaz.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.abandoned = False
+        self.held = []
+
+    def acquire(self, semaphore):
+        """Yer al; grup bırakıldıysa False döndür"""
+        while not semaphore.acquire(timeout=0.5):
+            if self.abandoned:
+                return False
+        with self._lock:
+            if not self.abandoned:
+                self.held.append(semaphore)
+                return True
+        semaphore.release()
+        return False
+
+    def release(self, semaphore):
+        with self._lock:
+            if semaphore not in self.held:
+                return
+            self.held.remove(semaphore)
+        semaphore.release()
+
+    def abandon(self):
+        with self._lock:
+            self.abandoned = True
+            held, self.held = self.held, []
+        for semaphore in held:
+            semaphore.release()
+
+class HostLimiter:
+    """Host bazlı eşzamanlı istek sınırlayıcı (twitch.tv, kick.com ...)"""
+
+    def __init__(self, host_limits):
+        self.host_limits = host_limits
+        self.semaphores = {
+            host: threading.BoundedSemaphore(max(1, int(limit)))
+            for host, limit in host_limits.items()
+        }
+
+    @contextlib.contextmanager
+    def slot(self, url, claim=None):
+        """URL'nin host'u için yer tut; ``claim`` verilirse yer o gruba yazılır"""
+        host = get_host_key(url, self.host_limits)
+        if host is None:
+            yield
+            return
+        semaphore = self.semaphores[host]
+        if claim is None:
+            with semaphore:
+                yield
+            return
+        if not claim.acquire(semaphore):
+            raise ChannelUnavailable("Source abandoned")
+        try:
+            yield
+        finally:
+            claim.release(semaphore)
+
+def run_in_daemon_thread(target, *args):
+    """``target``'ı daemon thread'de çalıştır, sonucunu ``Future`` olarak döndür.
+
+    Takılan Streamlink çağrıları bırakıldığında havuzda yer tutmaz ve süreç
+    çıkarken beklenmez.
+    """
+    future = Future()
+
+    def run():
+        if not future.set_running_or_notify_cancel():
+            return
+        try:
+            future.set_result(target(*args))
+        except BaseException as e:
+            future.set_exception(e)
+
+    threading.Thread(target=run, daemon=True).start()
+    return future
+
+def remove_channel_files(*file_paths):
+    for file_path in file_paths:
+        if os.path.isfile(file_path):
+            os.remove(file_path)
+
+class ChannelUnavailable(Exception):
+    """Kanal için kullanılabilir multivariant playlist bulunamadı"""
+
+    def __init__(self, reason, *details):
+        super().__init__(reason)
+        self.reason = reason
+        self.details = details
+
+def written_uris(texts):
+    """Playlist metinlerindeki URI satırları ve URI="..." öznitelikleri (tekrarsız, sıralı)"""
+    uris = set()
+    for text in texts:
+        for line in text.splitlines():
+            line = line.strip()
+            if line.startswith("#"):
+                uris.update(re.findall(r'URI="([^"]+)"', line))
+            elif line:
+                uris.add(line)
+    return sorted(uris)
+
+def has_playlist_content(text):
+    return bool(text.strip()) and len(text.strip()) > len('#EXTM3U\n')
+
+def build_channel_playlists(url, session_manager, limiter=None, low_latency=False, profiles=None, claim=None):
+    """Kanal URL'sini çöz ve master/best playlist metinlerini üret.
+
+    Stream bulunamazsa ``ChannelUnavailable`` fırlatır. Dönen sözlükte
+    ``master``, ``best`` ve bitiş zamanı için ``expiry_urls`` bulunur.
+    ``low_latency`` açıksa eklentiye "low-latency" seçeneği geçilir ve
+    LL-HLS etiketlerini koruyan ``ll`` playlist'i de üretilir. ``profiles``
+    içindeki her profil de aynı multivariant'tan kendi adıyla üretilir.
+    ``claim`` verilirse host yerleri o gruba (``SlotClaim``) yazılır.
+    """
+    # Get streams and playlists
+    options = {"low-latency": True} if low_latency else None
+    with limiter.slot(url, claim) if limiter else contextlib.nullcontext():
+        streams = session_manager.streams(url, options=options)
+
+    if not streams:
+        raise ChannelUnavailable("No streams found")
+
+    if 'best' not in streams:
+        raise ChannelUnavailable("No 'best' stream found", f"Available streams: {list(streams.keys())}")
+
+    best_stream = streams['best']
+    if not hasattr(best_stream, 'multivariant') or not best_stream.multivariant.playlists:
+        raise ChannelUnavailable("No multivariant playlists found")
+
+    playlists = best_stream.multivariant.playlists
+
+    # Create playlists
+    output = {
+        "master": create_master_playlist(playlists, best_stream.multivariant),
+        "best": create_best_playlist(playlists, best_stream.multivariant)
+    }
+    if profiles:
+        output.update(create_profile_playlists(playlists, best_stream.multivariant, profiles))
+
+    multivariant_url = getattr(best_stream.multivariant, "uri", None)
+    if low_latency and multivariant_url:
+        # Streamlink'in M3U8 modeli LL etiketlerini tutmadığı için ham multivariant tekrar alınır
+        try:
+            with limiter.slot(url, claim) if limiter else contextlib.nullcontext():
+                response = session_manager.session.http.get(multivariant_url)
+            output["ll"] = create_low_latency_playlist(response.text, multivariant_url)
+        except Exception:
+            output["ll"] = output["master"]
+
+    # HTTPS -> HTTP for cinergroup plugin
+    if url.startswith("http://"):
+        try:
+            plugin_name, plugin_type, given_url = session_manager.resolve_url(url)
+            if plugin_name == "cinergroup":
+                output = {variant: text.replace("https://", "http://") for variant, text in output.items()}
+        except:
+            pass
+
+    # Bitiş zamanı yalnızca dosyalara yazılan URI'lerden okunur
+    output["expiry_urls"] = written_uris(output.values())
+    return output
+
+def sources_failed(errors):
+    """Tüm kaynaklar başarısız olduğunda tek bir hata fırlat"""
+    if all(isinstance(error, ChannelUnavailable) for _, error in errors):
+        raise ChannelUnavailable("No healthy source found", *[f"{url}: {error.reason}" for url, error in errors])
+    raise next(error for _, error in errors if not isinstance(error, ChannelUnavailable))
+
+def failover_sources(urls, session_manager, limiter=None, low_latency=False, profiles=None):
+    """Kaynakları sırayla dene, ilk sağlıklı sonucu döndür"""
+    errors = []
+    for url in urls:
+        try:
+            playlists = build_channel_playlists(url, session_manager, limiter, low_latency, profiles)
+        except Exception as e:
+            errors.append((url, e))
+            continue
+        if has_playlist_content(playlists["master"]):
+            playlists["source"] = url
+            return playlists
+        errors.append((url, ChannelUnavailable("No valid content generated")))
+    sources_failed(errors)
+
+def race_sources(urls, session_manager, limiter=None, low_latency=False, profiles=None, head_start=0):
+    """Kaynakları eşzamanlı çöz, ilk sağlıklı sonucu döndür; yavaş kalanlar beklenmez.
+
+    ``head_start`` verilirse ilk kaynak (son kazanan) önce tek başına başlar;
+    bu sürede bitmezse ya da başarısız olursa diğerleri de başlatılır.
+    Kaybeden kaynakların host yerleri sonuç belli olunca geri verilir.
+    """
+    claim = SlotClaim()
+    future_to_url = {}
+    errors = []
+
+    def start(url):
+        future = run_in_daemon_thread(build_channel_playlists, url, session_manager, limiter, low_latency, profiles, claim)
+        future_to_url[future] = url
+
+    def finished(future):
+        """Sağlıklı sonuç ya da None (hata errors'a eklenir)"""
+        url = future_to_url[future]
+        try:
+            playlists = future.result()
+        except Exception as e:
+            errors.append((url, e))
+            return None
+        if has_playlist_content(playlists["master"]):
+            playlists["source"] = url
+            return playlists
+        errors.append((url, ChannelUnavailable("No valid content generated")))
+        return None
+
+    try:
+        remaining = list(urls)
+        checked = set()
+        if head_start and len(remaining) > 1:
+            start(remaining.pop(0))
+            done, _ = wait(list(future_to_url), timeout=head_start)
+            for future in done:
+                checked.add(future)
+                playlists = finished(future)
+                if playlists:
+                    return playlists
+        for url in remaining:
+            start(url)
+        for future in as_completed([future for future in future_to_url if future not in checked]):
+            playlists = finished(future)
+            if playlists:
+                return playlists
+    finally:
+        claim.abandon()
+    sources_failed(errors)
+
+def resolve_channel(channel, session_manager, limiter=None, source_state=None, source_mode="race", profiles=None):
+    """Kanalı çöz; birden fazla kaynağı varsa yarıştır ("race") ya da sırayla dene ("failover").
+
+    Dönen playlist sözlüğüne kazanan kaynak (``source``) ve süresi
+    (``elapsed``) eklenir. Kazanan kaynak ``source_state``'e kaydedilir;
+    bir sonraki çalıştırmada ilk sıraya alınır ve yarışta ``RACE_HEAD_START``
+    saniye önden başlar.
+    """
+    slug = channel.get("slug", "unknown")
+    urls = channel_urls(channel)
+    remembered = bool(source_state) and source_state.preferred(slug) in urls
+    if source_state:
+        urls = source_state.order(slug, urls)
+
+    low_latency = bool(channel.get("lowLatency", False))
+    started = time.monotonic()
+    if len(urls) == 1:
+        playlists = build_channel_playlists(urls[0], session_manager, limiter, low_latency, profiles)
+        playlists["source"] = urls[0]
+    elif source_mode == "failover":
+        playlists = failover_sources(urls, session_manager, limiter, low_latency, profiles)
+    else:
+        playlists = race_sources(urls, session_manager, limiter, low_latency, profiles,
+                                 head_start=RACE_HEAD_START if remembered else 0)
+    playlists["elapsed"] = time.monotonic() - started
+
+    if source_state and len(urls) > 1:
+        source_state.record(slug, playlists["source"], playlists["elapsed"])
+    return playlists
+
+def process_channel(channel, idx, total, folders, limiter, session_manager, should_abort=None,
+                    source_state=None, source_mode="race", profiles=None):
+    """Tek bir kanalı çöz ve dosyalarını yaz.
+
+    ``folders`` playlist türünü ("master", "best", "ll" ve profil adları) klasöre eşler.
+    Çıktı satırları paralel modda birbirine karışmasın diye ``log`` listesinde
+    toplanır ve kanal bitince tek parça halinde yazdırılır.
+    """
+    slug = channel.get("slug", "unknown")
+    urls = channel_urls(channel)
+    name = channel.get("name", slug)
+    log = [f"[{idx}/{total}] Processing: {name}", f"  URL: {' | '.join(urls)}"]
+    result = {"slug": slug, "status": "fail", "channel": None, "log": log}
+
+    file_paths = {variant: os.path.join(folder, f"{slug}.m3u8") for variant, folder in folders.items()}
+
+    try:
+        playlists = resolve_channel(channel, session_manager, limiter, source_state, source_mode, profiles)
+        timing = session_manager.timings.get(playlists["source"])
+        if timing:
+            log.append(f"  ⏱️  Plugin: {timing['plugin']} (resolve {timing['resolve']:.3f}s, fetch {timing['fetch']:.2f}s)")
+        if len(urls) > 1:
+            log.append(f"  🏁 Source: {playlists['source']} ({playlists['elapsed']:.2f}s)")
+
+        # Süre aşımı nedeniyle bırakılan kanalın geç gelen sonucu yazılmaz
+        if should_abort and should_abort():
+            result["status"] = "skipped"
+            return result
+
+        # File operations
+        if has_playlist_content(playlists["master"]):
+            for variant, file_path in file_paths.items():
+                if playlists.get(variant):
+                    with open(file_path, "w+", encoding='utf-8') as playlist_file:
+                        playlist_file.write(playlists[variant])
+                else:
+                    # Ör. low latency kapatılan kanalın eski ll dosyası ya da boş kalan profil
+                    remove_channel_files(file_path)
+
+            log.append(f"  ✅ Success - Files created")
+            result["status"] = "success"
+            result["channel"] = {
+                "slug": slug,
+                "name": name,
+                "master_file": f"{slug}.m3u8"
+            }
+            result["expiry_urls"] = playlists["expiry_urls"]
+            result["source"] = playlists["source"]
+        else:
+            log.append(f"  ⚠️  No valid content generated for {slug}")
+            result["error"] = "No valid content generated"
+            # Clean up any existing files
+            remove_channel_files(*file_paths.values())
+
+    except ChannelUnavailable as e:
+        log.append(f"  ⚠️  {e.reason} for {slug}")
+        result["error"] = e.reason
+        for detail in e.details:
+            log.append(f"  {detail}")
+
+    except Exception as e:
+        log.append(f"  ❌ ERROR processing {slug}: {str(e)}")
+        result["error"] = str(e) or type(e).__name__
+        log.append(f"  {traceback.format_exc()}")
+
+        # Clean up on error
+        remove_channel_files(*file_paths.values())
+
+    return result
+
+def resolve_channels(channels, folders, session_manager, concurrency=1, host_limits=None,
+                     deadline=None, channel_timeout=None, source_state=None, source_mode="race", profiles=None):
+    """Kanalları en fazla ``concurrency`` tanesi aynı anda (1 ise sırayla) çöz.
+
+    Kanallar verilen sırayla kuyruğa alınır ve sonuçlar aynı sırayla döner.
+    ``deadline`` (``time.monotonic()`` değeri) geçtiğinde bitmemiş kanallar
+    "skipped", ``channel_timeout`` saniyeyi aşan kanallar "fail" olarak
+    işaretlenir; bunların geç gelen sonuçları dosyaya yazılmaz.
+    """
+    limiter = HostLimiter(host_limits or {})
+    total = len(channels)
+    results = [None] * total
+    started_at = {}
+    abandoned = set()
+
+    def run(index):
+        return process_channel(channels[index], index + 1, total, folders, limiter, session_manager,
+                               should_abort=lambda: index in abandoned, source_state=source_state, source_mode=source_mode,
+                               profiles=profiles)
+
+    def abandon(index, status, message, error=None):
+        abandoned.add(index)
+        slug = channels[index].get("slug", "unknown")
+        results[index] = {"slug": slug, "status": status, "channel": None, "log": [f"  {message} for {slug}"]}
+        if error:
+            results[index]["error"] = error
+        print("\n".join(results[index]["log"]))
+
+    # Her kanal kendi daemon thread'inde çalışır; bırakılan (süresi aşan) kanalın
+    # yeri hemen sıradaki kanala verilir, takılan çağrı havuzu tıkamaz
+    queued = list(range(total))
+    future_to_index = {}
+    pending = set()
+
+    def fill():
+        while queued and len(pending) < max(1, concurrency):
+            index = queued.pop(0)
+            started_at[index] = time.monotonic()
+            future = run_in_daemon_thread(run, index)
+            future_to_index[future] = index
+            pending.add(future)
+
+    fill()
+    while pending:
+        now = time.monotonic()
+        wake_times = [deadline] if deadline else []
+        if channel_timeout:
+            wake_times += [started_at[future_to_index[future]] + channel_timeout for future in pending]
+        timeout = max(0, min(wake_times) - now) if wake_times else None
+
+        done, pending = wait(pending, timeout=timeout, return_when=FIRST_COMPLETED)
+        for future in done:
+            index = future_to_index[future]
+            results[index] = future.result()
+            print("\n".join(results[index]["log"]))
+
+        now = time.monotonic()
+        if channel_timeout:
+            for future in list(pending):
+                index = future_to_index[future]
+                if now - started_at[index] >= channel_timeout:
+                    pending.discard(future)
+                    abandon(index, "fail", f"⏰ Timed out after {channel_timeout}s", f"Timed out after {channel_timeout}s")
+
+        if deadline and now >= deadline and (pending or queued):
+            print(f"\n⏰ Run deadline reached, {len(pending) + len(queued)} channels left unrefreshed")
+            for index in [future_to_index[future] for future in pending] + queued:
+                abandon(index, "skipped", "⏭️  Skipped (deadline)")
+            break
+        fill()
+
+    return results
+
+def prioritize(channels, indices, scheduler):
+    """Önce config'teki "priority" (büyük olan önce), eşitlikte en eski çözülen önce"""
+    return sorted(
+        indices,
+        key=lambda index: (
+            -int(channels[index].get("priority", 0)),
+            scheduler.resolved_at(channels[index].get("slug", "unknown"))
+        )
+    )
+
+def channels_with_defaults(config):
+    """Kanal listesini global ayarlarla (ör. "lowLatency") tamamlanmış kopyalar olarak döndür"""
+    low_latency = bool(config.get("lowLatency", False))
+    return [dict(channel, lowLatency=channel.get("lowLatency", low_latency)) for channel in config["channels"]]
+
+def load_config(config_file):
     print(f"Loading config from: {config_file}")
-    
+
     try:
         with open(config_file, "r", encoding='utf-8') as f:
-            config = json.load(f)
+            return json.load(f)
     except Exception as e:
         print(f"❌ ERROR loading config file: {e}")
         sys.exit(1)
 
+def create_refresh_scheduler(config):
+    """config.json içindeki "refresh" ayarlarından zamanlayıcı oluştur"""
+    refresh_config = config.get("refresh", {})
+    return RefreshScheduler(
+        refresh_config.get("stateFile", DEFAULT_REFRESH_STATE_FILE),
+        default_ttl=int(refresh_config.get("defaultTtl", 7200)),
+        margin=int(refresh_config.get("margin", 900))
+    )
+
+def fresh_result(channel):
+    """Bu geçişte çözülmeyen ama yayınlanmış dosyası hâlâ geçerli olan kanal"""
+    slug = channel.get("slug", "unknown")
+    return {
+        "slug": slug,
+        "status": "fresh",
+        "channel": {
+            "slug": slug,
+            "name": channel.get("name", slug),
+            "master_file": f"{slug}.m3u8"
+        },
+        "log": []
+    }
+
+def skipped_result(channel, status):
+    """Streamlink'e hiç gönderilmeyen kanal ("offline": canlılık kontrolü, "backoff": geri çekilme)"""
+    return {"slug": channel.get("slug", "unknown"), "status": status, "channel": None, "log": []}
+
+def create_channel_health(config):
+    """config.json içindeki "health" ayarlarından backoff durumunu oluştur"""
+    health_config = config.get("health", {})
+    return ChannelHealth(
+        health_config.get("stateFile", DEFAULT_HEALTH_STATE_FILE),
+        base_delay=int(health_config.get("baseDelay", 3600)),
+        max_delay=int(health_config.get("maxDelay", 86400)),
+        jitter=float(health_config.get("jitter", 0.2)),
+        threshold=int(health_config.get("threshold", 2))
+    )
+
+def run_once(config, session_manager, scheduler, health, source_state, only_due=False):
+    """Tek bir çözümleme geçişi. ``only_due`` açıksa sadece süresi dolmak üzere olan kanallar çözülür"""
+    started = time.monotonic()
     # Getting output options and creating folders
     folder_name = config["output"]["folder"]
     best_folder_name = config["output"]["bestFolder"]
@@ -111,103 +692,91 @@ def main():
     root_folder = os.path.join(current_dir, folder_name)
     best_folder = os.path.join(root_folder, best_folder_name)
     master_folder_path = os.path.join(root_folder, master_folder_name) if master_folder_name else root_folder
+    ll_folder = os.path.join(root_folder, config["output"].get("llFolder", "ll"))
+    folders = {"master": master_folder_path, "best": best_folder, "ll": ll_folder}
+    profiles = load_profiles(config)
+    for name, profile in profiles.items():
+        folders[name] = os.path.join(root_folder, profile.get("folder", name))
     
     print(f"Creating folders:")
     print(f"  Root: {root_folder}")
     print(f"  Best: {best_folder}")
     print(f"  Master: {master_folder_path}")
+    print(f"  Low latency: {ll_folder}")
+    for name in profiles:
+        print(f"  Profile {name}: {folders[name]}")
     
-    os.makedirs(best_folder, exist_ok=True)
-    os.makedirs(master_folder_path, exist_ok=True)
+    for folder in folders.values():
+        os.makedirs(folder, exist_ok=True)
 
-    channels = config["channels"]
-    print(f"\n=== Processing {len(channels)} channels ===\n")
-    
-    success_count = 0
-    fail_count = 0
-    processed_channels = []
+    channels = channels_with_defaults(config)
+    concurrency = int(config.get("concurrency", 1))
+    host_limits = config.get("hostLimits", DEFAULT_HOST_LIMITS)
+    run_deadline = float(config.get("deadline", 0))
+    channel_timeout = float(config.get("channelTimeout", 0)) or None
+    source_mode = config.get("sources", {}).get("mode", "race")
 
-    for idx, channel in enumerate(channels, 1):
+    results = [None] * len(channels)
+    for index, channel in enumerate(channels):
         slug = channel.get("slug", "unknown")
-        url = channel.get("url", "")
-        name = channel.get("name", slug)
-        
-        print(f"[{idx}/{len(channels)}] Processing: {name}")
-        print(f"  URL: {url}")
-        
-        master_file_path = os.path.join(master_folder_path, f"{slug}.m3u8")
-        best_file_path = os.path.join(best_folder, f"{slug}.m3u8")
-        
-        try:
-            # Get streams and playlists
-            streams = streamlink.streams(url)
-            
-            if not streams:
-                print(f"  ⚠️  No streams found for {slug}")
-                fail_count += 1
-                continue
-                
-            if 'best' not in streams:
-                print(f"  ⚠️  No 'best' stream found for {slug}")
-                print(f"  Available streams: {list(streams.keys())}")
-                fail_count += 1
-                continue
-            
-            best_stream = streams['best']
-            if not hasattr(best_stream, 'multivariant') or not best_stream.multivariant.playlists:
-                print(f"  ⚠️  No multivariant playlists found for {slug}")
-                fail_count += 1
-                continue
-            
-            playlists = best_stream.multivariant.playlists
-
-            # Create playlists
-            master_text = create_master_playlist(playlists, best_stream.multivariant)
-            best_text = create_best_playlist(playlists, best_stream.multivariant)
-
-            # HTTPS -> HTTP for cinergroup plugin
-            if url.startswith("http://"):
-                try:
-                    plugin_name, plugin_type, given_url = streamlink.session.Streamlink().resolve_url(url)
-                    if plugin_name == "cinergroup":
-                        master_text = master_text.replace("https://", "http://")
-                        best_text = best_text.replace("https://", "http://")
-                except:
-                    pass
-
-            # File operations
-            if master_text.strip() and len(master_text.strip()) > len('#EXTM3U\n'):
-                with open(master_file_path, "w+", encoding='utf-8') as master_file:
-                    master_file.write(master_text)
-
-                with open(best_file_path, "w+", encoding='utf-8') as best_file:
-                    best_file.write(best_text)
-                
-                print(f"  ✅ Success - Files created")
-                success_count += 1
-                processed_channels.append({
-                    "slug": slug,
-                    "name": name,
-                    "master_file": f"{slug}.m3u8"
-                })
-            else:
-                print(f"  ⚠️  No valid content generated for {slug}")
-                # Clean up any existing files
-                for file_path in [master_file_path, best_file_path]:
-                    if os.path.isfile(file_path):
-                        os.remove(file_path)
-                fail_count += 1
-                
-        except Exception as e:
-            print(f"  ❌ ERROR processing {slug}: {str(e)}")
-            print(f"  {traceback.format_exc()}")
-            
-            # Clean up on error
-            for file_path in [master_file_path, best_file_path]:
-                if os.path.isfile(file_path):
-                    os.remove(file_path)
-            fail_count += 1
-    
+        if health.in_backoff(slug):
+            # Art arda başarısız olan kanal geri çekilme süresi dolana kadar atlanır
+            results[index] = skipped_result(channel, "backoff")
+        elif only_due and not scheduler.is_due(slug) and os.path.isfile(os.path.join(master_folder_path, f"{slug}.m3u8")):
+            # Süresi dolmamış ve dosyası yerinde olan kanallar bu geçişte atlanır
+            results[index] = fresh_result(channel)
+    due_indices = [index for index, result in enumerate(results) if result is None]
+
+    # Toplu canlılık kontrolü: çevrimdışı olduğu bilinen kanallar Streamlink'e gönderilmez
+    precheck_config = config.get("precheck", {})
+    if precheck_config.get("enabled", False) and due_indices:
+        precheck = LivePrecheck.from_config(session_manager.session.http, precheck_config)
+        live_status = precheck.check([channels[index] for index in due_indices])
+        offline_slugs = {slug for slug, is_live in live_status.items() if is_live is False}
+        if offline_slugs:
+            print(f"\n⚫ Offline (precheck): {', '.join(sorted(offline_slugs))}")
+        for index in due_indices:
+            if channels[index].get("slug", "unknown") in offline_slugs:
+                results[index] = skipped_result(channels[index], "offline")
+        due_indices = [index for index in due_indices if results[index] is None]
+
+    print(f"\n=== Processing {len(due_indices)}/{len(channels)} channels (concurrency: {concurrency}) ===\n")
+
+    due_indices = prioritize(channels, due_indices, scheduler)
+    deadline = started + run_deadline if run_deadline else None
+    due_results = resolve_channels([channels[index] for index in due_indices], folders, session_manager,
+                                   concurrency, host_limits, deadline=deadline, channel_timeout=channel_timeout,
+                                   source_state=source_state, source_mode=source_mode, profiles=profiles)
+    for index, result in zip(due_indices, due_results):
+        results[index] = result
+
+    for result in results:
+        if result["status"] == "success":
+            scheduler.record(result["slug"], result.get("expiry_urls", []))
+            health.record_success(result["slug"])
+        elif result["status"] in ("fail", "offline"):
+            scheduler.forget(result["slug"])
+            # Yalnızca Streamlink hataları geri çekilmeye sayılır; çevrimdışı kanalın
+            # tekrar kontrolü ortak precheck isteğinde neredeyse bedavadır
+            if result["status"] == "fail":
+                health.record_failure(result["slug"], result.get("error", result["status"]))
+        elif result["status"] == "skipped":
+            scheduler.mark_attempted(result["slug"])
+    scheduler.save()
+    health.save()
+    source_state.save()
+
+    success_count = sum(1 for result in results if result["status"] == "success")
+    fail_count = sum(1 for result in results if result["status"] == "fail")
+    fresh_count = sum(1 for result in results if result["status"] == "fresh")
+    offline_count = sum(1 for result in results if result["status"] == "offline")
+    skipped_count = sum(1 for result in results if result["status"] == "skipped")
+    backoff_names = [
+        channel.get("name", channel.get("slug", "unknown"))
+        for channel, result in zip(channels, results) if result["status"] == "backoff"
+    ]
+    processed_channels = [result["channel"] for result in results if result["channel"]]
+
     # Create final M3U playlist with all channels
     if processed_channels:
         print(f"\n=== Creating final M3U playlist ===")
@@ -264,7 +833,58 @@ def main():
     print(f"\n=== Summary ===")
     print(f"✅ Successful: {success_count}")
     print(f"❌ Failed: {fail_count}")
+    if offline_count:
+        print(f"⚫ Offline (precheck): {offline_count}")
+    if skipped_count:
+        print(f"⏭️  Skipped (deadline): {skipped_count}")
+    if backoff_names:
+        print(f"⏸️  Skipped (backoff): {len(backoff_names)} - {', '.join(backoff_names)}")
+    if only_due:
+        print(f"⏭️  Still valid (not refreshed): {fresh_count}")
     print(f"Total: {len(channels)}")
 
+    timing_summary = session_manager.timing_summary()
+    print(f"⏱️  Plugin resolution: {timing_summary['resolve']:.3f}s, stream fetch: {timing_summary['fetch']:.2f}s ({timing_summary['count']} channels)")
+
+def main():
+    parser = argparse.ArgumentParser(description="Resolve Twitch/Kick channels into master/best playlists")
+    parser.add_argument("config", nargs="?", default="config.json", help="config file (default: config.json)")
+    parser.add_argument("--due-only", action="store_true", help="only re-resolve channels whose URLs are close to expiring")
+    parser.add_argument("--loop", action="store_true", help="keep running and refresh channels as they approach expiry")
+    args = parser.parse_args()
+
+    print("=== Starting stream processing ===")
+    config = load_config(args.config)
+    channels = config["channels"]
+
+    # Tüm kanallar için tek bir Streamlink oturumu
+    lazy_plugins = bool(config.get("lazyPlugins", False))
+    session_options = {}
+    if config.get("channelTimeout"):
+        # Tek bir HTTP isteği kanal süresinden uzun takılamasın
+        session_options["http-timeout"] = float(config["channelTimeout"])
+    session_manager = SessionManager.for_channels(channels, lazy_plugins=lazy_plugins, options=session_options)
+    if lazy_plugins:
+        loaded_plugins = sorted(session_manager.session.plugins.get_loaded())
+        print(f"Lazy plugins: {', '.join(loaded_plugins) if loaded_plugins else 'fallback to full plugin index'}\n")
+
+    scheduler = create_refresh_scheduler(config)
+    health = create_channel_health(config)
+    source_state = SourceState(config.get("sources", {}).get("stateFile", DEFAULT_SOURCE_STATE_FILE))
+    if not args.loop:
+        run_once(config, session_manager, scheduler, health, source_state, only_due=args.due_only)
+        return
+
+    interval = int(config.get("refresh", {}).get("interval", 300))
+    while True:
+        run_once(config, session_manager, scheduler, health, source_state, only_due=True)
+        slugs = [channel.get("slug", "unknown") for channel in channels]
+        # Çözülemeyen kanallar bir aralık sonra, geri çekilmedekiler süreleri dolunca denenir
+        next_due_at = scheduler.next_due_at(slugs, retry_interval=interval,
+                                            held_until={slug: health.next_attempt_at(slug) for slug in slugs})
+        sleep_for = interval if next_due_at is None else min(interval, max(1, next_due_at - time.time()))
+        print(f"\n💤 Next refresh check in {sleep_for:.0f}s\n")
+        time.sleep(sleep_for)
+
 if __name__=="__main__": 
     main()
@@ -1,15 +1,11 @@
 import requests
-import re
-import concurrent.futures
-from urllib.parse import urlparse, urljoin
-from concurrent.futures import ThreadPoolExecutor
+from urllib.parse import urlparse
 import time
-import urllib3
 import os
+import asyncio
 import dropbox
 
-# Suppress InsecureRequestWarning
-urllib3.disable_warnings(urllib3.exceptions.InsecureRequestWarning)
+from stream_validator import DEFAULT_MAX_IN_FLIGHT, DEFAULT_PER_HOST, DEFAULT_RATE, HostHealth, StreamValidator, ValidationCache
 
 # -----------------------------
 # Dropbox ve M3U sabitleri
@@ -20,9 +16,8 @@ OUTPUT_FILE = f"{DOCS_DIR}/playlist.m3u"
 EPG_URL = "https://epgshare01.online/epgshare01/epg_ripper_DUMMY_CHANNELS.xml.gz"
 TVG_ID = "Blank.Dummy.us"
 LOGO_URL = "https://github.com/BuddyChewChew/gen-playlist/blob/main/docs/chb.png?raw=true"
-
-# Cache for URL validation
-url_cache = {}
+# "full": HEAD + full playlist body (legacy), "budget": no HEAD, playlists read up to the first URI
+PROBE_MODE = os.getenv("PROBE_MODE", "full")
 
 # -----------------------------
 # Fonksiyonlar
@@ -43,65 +38,29 @@ def is_valid_url(url):
     except ValueError:
         return False
 
-def check_stream(url, timeout=8, max_attempts=1):
-    if url in url_cache:
-        return url_cache[url]
-
-    headers = {
-        'User-Agent': 'Mozilla/5.0',
-        'Accept': '*/*',
-        'Connection': 'close',
-        'Referer': 'https://www.google.com/'
-    }
-
-    for attempt in range(max_attempts):
-        try:
-            if url.endswith(('.m3u8', '.m3u')):
-                # Check playlist
-                response = requests.head(url, headers=headers, timeout=timeout, allow_redirects=True, verify=False)
-                if response.status_code != 200:
-                    return False, url
-                # Fetch full playlist for m3u8
-                if url.endswith('.m3u8'):
-                    response = requests.get(url, headers=headers, timeout=timeout, verify=False)
-                    if response.status_code == 200 and '#EXTM3U' in response.text:
-                        if '#EXT-X-STREAM-INF' in response.text:
-                            variants = re.findall(r'\n([^\n\.]+\.m3u8[^\n]*)', response.text)
-                            if variants:
-                                variant_url = variants[0]
-                                if not variant_url.startswith('http'):
-                                    variant_url = urljoin(url, variant_url)
-                                return check_stream(variant_url, timeout, 1)
-                        return True, url
-                    else:
-                        return False, url
-            else:
-                # Direct video/audio
-                range_headers = headers.copy()
-                range_headers['Range'] = 'bytes=0-1024'
-                with requests.get(url, headers=range_headers, timeout=timeout, stream=True, verify=False) as response:
-                    if response.status_code in (200, 206):
-                        chunk = next(response.iter_content(chunk_size=1024), None)
-                        if not chunk:
-                            return False, url
-                        content_type = response.headers.get('Content-Type', '').lower()
-                        if not any(x in content_type for x in ['video/', 'audio/', 'application/octet-stream', 'application/vnd.apple.mpegurl']):
-                            return False, url
-                        url_cache[url] = (True, url)
-                        return True, url
-        except Exception:
-            if attempt == max_attempts - 1:
-                return False, url
-            time.sleep(1)
-    return False, url
-
-def convert_to_m3u(content, output_file, max_workers=20):
-    lines = content.split('\n')
+def build_m3u_lines(entries, valid_keys):
+    # valid_keys: (name, url, group) of every stream that passed validation
     current_group = ""
     m3u_lines = [
         "#EXTM3U x-tvg-url=\"" + EPG_URL + "\"",
         "#EXT-X-TVG-URL: " + EPG_URL
     ]
+    seen_urls = set()
+    for entry in entries:
+        if entry[0] == 'group':
+            current_group = entry[1]
+            m3u_lines.append(f"#EXTINF:-1 tvg-id=\"{TVG_ID}\" group-title=\"{current_group}\",{current_group}")
+            m3u_lines.append("#" + current_group)
+        elif (entry[1], entry[2], current_group) in valid_keys and entry[2] not in seen_urls:
+            seen_urls.add(entry[2])
+            m3u_lines.append(f"#EXTINF:-1 tvg-id=\"{TVG_ID}\" tvg-logo=\"{LOGO_URL}\" group-title=\"{current_group}\",{entry[1].split(' ',1)[0] if ' ' in entry[1] else entry[1]}")
+            m3u_lines.append(entry[2])
+    return m3u_lines
+
+def convert_to_m3u(content, output_file, max_in_flight=DEFAULT_MAX_IN_FLIGHT, per_host=DEFAULT_PER_HOST, rate=DEFAULT_RATE,
+                   probe_mode=PROBE_MODE):
+    lines = content.split('\n')
+    current_group = ""
     entries = []
 
     for line in lines:
@@ -117,40 +76,58 @@ def convert_to_m3u(content, output_file, max_workers=20):
                 name, url = parts
                 entries.append(('stream', name.strip(), url.strip(), current_group))
 
-    # Parallel stream validation
+    # Concurrent stream validation (asyncio, pooled keep-alive connections)
     valid_streams = []
+    # Index for the assembly step, filled as results arrive
+    valid_keys = set()
     stream_entries = [e for e in entries if e[0] == 'stream']
-    print(f"Checking {len(stream_entries)} streams for availability...")
-    with ThreadPoolExecutor(max_workers=max_workers) as executor:
-        future_to_entry = {executor.submit(check_stream, e[2]): e for e in stream_entries}
-        for future in concurrent.futures.as_completed(future_to_entry):
-            entry = future_to_entry[future]
-            try:
-                is_valid, url = future.result()
-                if is_valid:
-                    valid_streams.append((entry[1], url, entry[3]))
-                    print(f"✓ {entry[1]}")
-                else:
-                    print(f"✗ {entry[1]} (unreachable)")
-            except Exception as e:
-                print(f"✗ {entry[1]} (error: {str(e)})")
+    entries_by_url = {}
+    for entry in stream_entries:
+        entries_by_url.setdefault(entry[2], []).append(entry)
+    print(f"Checking {len(stream_entries)} streams for availability ({probe_mode} probes)...")
+
+    # Results persist across runs (state/stream-validation.json, separate TTLs for valid/invalid)
+    cache = ValidationCache()
+    # Per-host timeouts from observed p95 latency; a host with repeated connection
+    # failures is skipped (state/stream-hosts.json, persists across runs)
+    hosts = HostHealth()
+    validator = StreamValidator(max_in_flight=max_in_flight, per_host=per_host, rate=rate, cache=cache,
+                                probe_mode=probe_mode, hosts=hosts)
+
+    def on_result(checked_url, result):
+        is_valid, url = result
+        # Body bytes read for this URL in this run (0 for cache hits)
+        size = validator.probe_bytes.get(checked_url, 0)
+        for entry in entries_by_url[checked_url]:
+            if is_valid:
+                valid_streams.append((entry[1], url, entry[3]))
+                valid_keys.add((entry[1], url, entry[3]))
+                print(f"✓ {entry[1]} ({size} B)")
+            else:
+                print(f"✗ {entry[1]} (unreachable, {size} B)")
+
+    try:
+        asyncio.run(validator.validate(list(entries_by_url), on_result))
+    finally:
+        cache.save()
+        hosts.save()
 
     # Build M3U file
-    current_group = ""
-    seen_urls = set()
-    for entry in entries:
-        if entry[0] == 'group':
-            current_group = entry[1]
-            m3u_lines.append(f"#EXTINF:-1 tvg-id=\"{TVG_ID}\" group-title=\"{current_group}\",{current_group}")
-            m3u_lines.append("#" + current_group)
-        else:
-            match = next((s for s in valid_streams if s[0]==entry[1] and s[2]==current_group and s[1]==entry[2] and s[1] not in seen_urls), None)
-            if match:
-                seen_urls.add(match[1])
-                m3u_lines.append(f"#EXTINF:-1 tvg-id=\"{TVG_ID}\" tvg-logo=\"{LOGO_URL}\" group-title=\"{current_group}\",{entry[1].split(' ',1)[0] if ' ' in entry[1] else entry[1]}")
-                m3u_lines.append(match[1])
+    m3u_lines = build_m3u_lines(entries, valid_keys)
 
     print(f"\nFound {len(valid_streams)}/{len(stream_entries)} working streams")
+    stats = validator.stats
+    print(f"Validation cache: {stats['hit']} hit, {stats['miss']} miss, {stats['coalesced']} coalesced "
+          f"({validator.hit_rate():.0%} hit rate)")
+    probes = stats['miss']
+    print(f"Transferred {stats['bytes'] / 1024:.1f} KB of response bodies in {probes} probes "
+          f"({stats['bytes'] / probes if probes else 0:.0f} B per probe)")
+    open_hosts = hosts.open_hosts()
+    if open_hosts:
+        print(f"Circuit open for {len(open_hosts)} hosts ({len(hosts.opened)} opened this run): "
+              f"{hosts.stats['short_circuited']} requests skipped, {hosts.stats['trials']} trial requests")
+        for host in open_hosts:
+            print(f"  ⚠️ {host}")
     with open(output_file, 'w', encoding='utf-8') as f:
         f.write('\n'.join(m3u_lines))
     print(f"Successfully converted to {output_file}")
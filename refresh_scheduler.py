@@ -0,0 +1,176 @@
+import base64
+import json
+import re
+import time
+from urllib.parse import urlparse, parse_qs, unquote
+
+from state_file import load_state, save_state
+
+# Süre bilgisi taşıyabilen query parametreleri (unix zaman damgası)
+EXPIRY_QUERY_KEYS = ("expires", "expire", "expiration", "exp", "e")
+# JSON ya da JWT token taşıyan query parametreleri (Twitch usher "token", Kick/IVS "token")
+TOKEN_QUERY_KEYS = ("token", "t")
+# Yoldaki token'lar (ör. ".../v1/playlist/<token>.m3u8") bundan kısaysa denenmez
+MIN_PATH_TOKEN_LENGTH = 32
+# base64 token içine gömülü JSON'daki bitiş alanı (protobuf gibi sarmalayıcılar içinde)
+EMBEDDED_EXPIRY_PATTERN = re.compile(rb'"(?:expires|exp)"\s*:\s*"?(\d{9,13})')
+
+
+def _to_timestamp(value):
+    """Saniye ya da milisaniye cinsinden zaman damgasını saniyeye çevir"""
+    try:
+        timestamp = float(value)
+    except (TypeError, ValueError):
+        return None
+    if timestamp <= 0:
+        return None
+    if timestamp > 1e12:
+        timestamp = timestamp / 1000
+    return timestamp
+
+
+def _jwt_expiry(token):
+    parts = token.split(".")
+    if len(parts) != 3:
+        return None
+    payload = parts[1] + "=" * (-len(parts[1]) % 4)
+    try:
+        claims = json.loads(base64.urlsafe_b64decode(payload))
+    except (ValueError, TypeError):
+        return None
+    return _to_timestamp(claims.get("exp")) if isinstance(claims, dict) else None
+
+
+def _token_expiry(token):
+    """Twitch JSON token'ındaki "expires" ya da JWT'deki "exp" alanını oku"""
+    try:
+        data = json.loads(token)
+    except ValueError:
+        return _jwt_expiry(token)
+    if isinstance(data, dict):
+        return _to_timestamp(data.get("expires") or data.get("exp"))
+    return None
+
+
+def _base64_decode(token):
+    padded = token.replace("+", "-").replace("/", "_") + "=" * (-len(token) % 4)
+    try:
+        return base64.urlsafe_b64decode(padded)
+    except (ValueError, TypeError):
+        return None
+
+
+def _path_expiry(path):
+    """URL yolundaki token segmentlerinden bitiş zamanını oku (JWT ya da base64 içinde JSON)"""
+    expiries = []
+    for segment in unquote(path).split("/"):
+        token = re.sub(r"\.m3u8?$", "", segment)
+        if len(token) < MIN_PATH_TOKEN_LENGTH:
+            continue
+        timestamp = _jwt_expiry(token) if token.count(".") == 2 else None
+        if timestamp is None:
+            decoded = _base64_decode(token)
+            match = EMBEDDED_EXPIRY_PATTERN.search(decoded) if decoded else None
+            timestamp = _to_timestamp(match.group(1)) if match else None
+        if timestamp:
+            expiries.append(timestamp)
+    return min(expiries) if expiries else None
+
+
+def extract_expiry(urls):
+    """URL listesindeki en erken bitiş zamanını bul, bulunamazsa None döndür.
+
+    Query parametreleri ve yoldaki token segmentleri okunur.
+    """
+    expiries = []
+    for url in urls:
+        if not url:
+            continue
+        query = parse_qs(urlparse(url).query)
+        for key in EXPIRY_QUERY_KEYS:
+            for value in query.get(key, []):
+                timestamp = _to_timestamp(value)
+                if timestamp:
+                    expiries.append(timestamp)
+        for key in TOKEN_QUERY_KEYS:
+            for value in query.get(key, []):
+                timestamp = _token_expiry(value)
+                if timestamp:
+                    expiries.append(timestamp)
+        timestamp = _path_expiry(urlparse(url).path)
+        if timestamp:
+            expiries.append(timestamp)
+    return min(expiries) if expiries else None
+
+
+class RefreshScheduler:
+    """Kanal bazında URL bitiş zamanlarını tutan ve yenileme zamanı gelenleri seçen zamanlayıcı.
+
+    Durum JSON dosyasında ``{slug: {"resolved_at", "expires_at", "source"}}``
+    şeklinde saklanır; çözülemeyen kanallar için yalnızca ``attempted_at``
+    tutulur. URL'lerde bitiş bilgisi yoksa ``default_ttl`` kullanılır.
+    """
+
+    def __init__(self, state_file, default_ttl=7200, margin=900):
+        self.state_file = state_file
+        self.default_ttl = default_ttl
+        self.margin = margin
+        self.state = load_state(state_file, "refresh state")
+
+    def save(self):
+        save_state(self.state_file, self.state)
+
+    def is_due(self, slug, now=None):
+        """Kanalın URL'leri bitmek üzereyse (ya da hiç kaydı yoksa) True döndür"""
+        entry = self.state.get(slug)
+        if not entry or not entry.get("expires_at"):
+            return True
+        now = time.time() if now is None else now
+        return entry["expires_at"] - self.margin <= now
+
+    def record(self, slug, urls, now=None):
+        """Çözümleme sonucundaki URL'lerden bitiş zamanını çıkarıp kaydet"""
+        now = time.time() if now is None else now
+        expires_at = extract_expiry(urls)
+        source = "token"
+        if expires_at is None or expires_at <= now:
+            expires_at = now + self.default_ttl
+            source = "default"
+        self.state[slug] = {
+            "resolved_at": int(now),
+            "expires_at": int(expires_at),
+            "source": source
+        }
+        return self.state[slug]
+
+    def resolved_at(self, slug):
+        """Kanalın en son çözüldüğü zaman (hiç çözülmediyse 0)"""
+        return (self.state.get(slug) or {}).get("resolved_at", 0)
+
+    def forget(self, slug, now=None):
+        """Başarısız kanalın bitiş kaydını sil (yeniden çözülsün), deneme zamanını tut"""
+        now = time.time() if now is None else now
+        self.state[slug] = {"attempted_at": int(now)}
+
+    def mark_attempted(self, slug, now=None):
+        """Çözülemeden atlanan kanalın deneme zamanını kaydet (bitiş kaydı korunur)"""
+        now = time.time() if now is None else now
+        self.state.setdefault(slug, {})["attempted_at"] = int(now)
+
+    def next_due_at(self, slugs, retry_interval=0, held_until=None, now=None):
+        """Verilen kanallar içinde en erken yenilenmesi gerekenin zamanı.
+
+        Bitiş kaydı olmayan ya da çözülemeyen kanal son denemesinden
+        ``retry_interval`` saniye sonra, geri çekilmedeki kanal
+        ``held_until[slug]`` zamanında yeniden denenir.
+        """
+        now = time.time() if now is None else now
+        held_until = held_until or {}
+        due_times = []
+        for slug in slugs:
+            entry = self.state.get(slug) or {}
+            due = entry["expires_at"] - self.margin if entry.get("expires_at") else now
+            if entry.get("attempted_at"):
+                due = max(due, entry["attempted_at"] + retry_interval)
+            due_times.append(max(due, held_until.get(slug, 0)))
+        return min(due_times) if due_times else None
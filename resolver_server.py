@@ -0,0 +1,237 @@
+"""main.py çözümleme mantığını kullanan yerel, istek üzerine çalışan HTTP servisi.
+
+Repo'ya kısa ömürlü m3u8 dosyaları yazmak yerine kanallar izleyici istediği
+anda çözülür:
+
+    /playlist.m3u           tüm kanallar, bu servise işaret eden URL'lerle
+    /master/<slug>.m3u8     create_master_playlist çıktısı
+    /best/<slug>.m3u8       create_best_playlist çıktısı
+    /ll/<slug>.m3u8         LL-HLS etiketleri korunmuş playlist ("lowLatency" kanallar)
+    /<profil>/<slug>.m3u8   config "profiles" ile tanımlı filtrelenmiş playlist'ler
+
+Sonuçlar TTL ile önbelleklenir, aynı kanal için eşzamanlı istekler tek bir
+Streamlink çağrısında birleştirilir ve TTL dolduktan sonraki kısa bir süre
+boyunca eski sonuç arka planda yenilenirken servis edilmeye devam eder.
+Çözülemeyen (çevrimdışı) kanalların hatası da kısa bir süre önbelleklenir.
+
+Kullanım:
+    python resolver_server.py [config.json] [--host 0.0.0.0] [--port 8080]
+"""
+import argparse
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+from main import (
+    DEFAULT_HOST_LIMITS,
+    DEFAULT_SOURCE_STATE_FILE,
+    ChannelUnavailable,
+    HostLimiter,
+    channels_with_defaults,
+    create_final_m3u_playlist,
+    has_playlist_content,
+    load_config,
+    load_profiles,
+    resolve_channel
+)
+from refresh_scheduler import extract_expiry
+from source_state import SourceState
+from streamlink_session import SessionManager
+
+PLAYLIST_CONTENT_TYPE = "application/vnd.apple.mpegurl"
+
+
+class PlaylistCache:
+    """Kanal bazında TTL önbelleği, istek birleştirme ve stale-while-revalidate.
+
+    ``resolve`` bir slug alıp playlist sözlüğü döndüren fonksiyondur. Aynı slug
+    için aynı anda yalnızca bir çözümleme çalışır; diğer istekler onun
+    sonucunu bekler. ``ChannelUnavailable`` hataları ``negative_ttl`` saniye
+    boyunca yeniden çözümleme yapılmadan tekrar fırlatılır.
+    """
+
+    def __init__(self, resolve, ttl=300, stale_ttl=120, workers=4, expiry_margin=60, negative_ttl=30):
+        self.resolve = resolve
+        self.ttl = ttl
+        self.stale_ttl = stale_ttl
+        self.negative_ttl = negative_ttl
+        self.expiry_margin = expiry_margin
+        self.executor = ThreadPoolExecutor(max_workers=workers)
+        self._lock = threading.Lock()
+        self._entries = {}
+        # slug -> (ChannelUnavailable, geçerlilik sonu)
+        self._failures = {}
+        self._inflight = {}
+        self.stats = {"hit": 0, "stale": 0, "miss": 0, "coalesced": 0, "negative": 0}
+
+    def _count(self, key):
+        with self._lock:
+            self.stats[key] += 1
+
+    def _fresh_until(self, payload, now):
+        """TTL'yi URL'lerin kendi bitiş zamanını geçmeyecek şekilde kırp"""
+        fresh_until = now + self.ttl
+        expires_at = extract_expiry(payload.get("expiry_urls", []))
+        if expires_at:
+            fresh_until = min(fresh_until, expires_at - self.expiry_margin)
+        return fresh_until
+
+    def _run(self, slug):
+        try:
+            try:
+                payload = self.resolve(slug)
+            except ChannelUnavailable as e:
+                with self._lock:
+                    self._failures[slug] = (e, time.time() + self.negative_ttl)
+                raise
+            now = time.time()
+            with self._lock:
+                self._entries[slug] = (payload, self._fresh_until(payload, now))
+                self._failures.pop(slug, None)
+            return payload
+        finally:
+            with self._lock:
+                self._inflight.pop(slug, None)
+
+    def _refresh(self, slug):
+        """Devam eden çözümleme varsa ona katıl, yoksa yenisini başlat"""
+        with self._lock:
+            future = self._inflight.get(slug)
+            if future is not None:
+                self.stats["coalesced"] += 1
+                return future
+            future = self.executor.submit(self._run, slug)
+            self._inflight[slug] = future
+            return future
+
+    def get(self, slug):
+        now = time.time()
+        with self._lock:
+            entry = self._entries.get(slug)
+            failure = self._failures.get(slug)
+
+        if entry:
+            payload, fresh_until = entry
+            if now < fresh_until:
+                self._count("hit")
+                return payload
+            if now < fresh_until + self.stale_ttl:
+                # Eskiyi hemen döndür, arka planda yenile
+                self._count("stale")
+                self._refresh(slug)
+                return payload
+
+        if failure and now < failure[1]:
+            # Çevrimdışı kanalın her isteği yeni bir Streamlink çağrısı başlatmasın
+            self._count("negative")
+            raise failure[0]
+
+        self._count("miss")
+        return self._refresh(slug).result()
+
+
+def create_handler(channels_by_slug, cache, variants=("master", "best", "ll")):
+    class ResolverHandler(BaseHTTPRequestHandler):
+        def _send(self, status, body, content_type="text/plain; charset=utf-8"):
+            data = body.encode("utf-8")
+            self.send_response(status)
+            self.send_header("Content-Type", content_type)
+            self.send_header("Content-Length", str(len(data)))
+            self.send_header("Cache-Control", "no-cache")
+            self.end_headers()
+            self.wfile.write(data)
+
+        def do_GET(self):
+            path = self.path.split("?", 1)[0]
+
+            if path == "/playlist.m3u":
+                base_url = f"http://{self.headers.get('Host', '127.0.0.1')}/"
+                body = create_final_m3u_playlist(channels_by_slug.values(), base_url, "master")
+                self._send(200, body, "audio/x-mpegurl; charset=utf-8")
+                return
+
+            parts = path.strip("/").split("/")
+            if len(parts) != 2 or parts[0] not in variants or not parts[1].endswith(".m3u8"):
+                self._send(404, "Not found\n")
+                return
+
+            variant, slug = parts[0], parts[1][:-len(".m3u8")]
+            if slug not in channels_by_slug:
+                self._send(404, f"Unknown channel: {slug}\n")
+                return
+
+            try:
+                playlists = cache.get(slug)
+            except ChannelUnavailable as e:
+                self._send(503, f"{e.reason} for {slug}\n")
+                return
+            except Exception as e:
+                self._send(502, f"Error resolving {slug}: {e}\n")
+                return
+
+            if not has_playlist_content(playlists["master"]):
+                self._send(503, f"No valid content generated for {slug}\n")
+                return
+
+            if not playlists.get(variant):
+                self._send(404, f"No {variant} playlist for {slug}\n")
+                return
+
+            self._send(200, playlists[variant], PLAYLIST_CONTENT_TYPE)
+
+        def log_message(self, format, *args):
+            print(f"[{self.log_date_time_string()}] {self.address_string()} {format % args}")
+
+    return ResolverHandler
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Serve master/best playlists by resolving channels on demand")
+    parser.add_argument("config", nargs="?", default="config.json", help="config file (default: config.json)")
+    parser.add_argument("--host", default=None, help="bind address (default: config server.host or 127.0.0.1)")
+    parser.add_argument("--port", type=int, default=None, help="bind port (default: config server.port or 8080)")
+    args = parser.parse_args()
+
+    config = load_config(args.config)
+    server_config = config.get("server", {})
+    channels = channels_with_defaults(config)
+    channels_by_slug = {channel.get("slug", "unknown"): channel for channel in channels}
+
+    session_manager = SessionManager.for_channels(channels, lazy_plugins=bool(config.get("lazyPlugins", False)))
+    limiter = HostLimiter(config.get("hostLimits", DEFAULT_HOST_LIMITS))
+
+    sources_config = config.get("sources", {})
+    source_state = SourceState(sources_config.get("stateFile", DEFAULT_SOURCE_STATE_FILE))
+    source_mode = sources_config.get("mode", "race")
+    profiles = load_profiles(config)
+
+    def resolve(slug):
+        return resolve_channel(channels_by_slug[slug], session_manager, limiter, source_state, source_mode, profiles)
+
+    cache = PlaylistCache(
+        resolve,
+        ttl=int(server_config.get("ttl", 300)),
+        stale_ttl=int(server_config.get("staleTtl", 120)),
+        workers=int(config.get("concurrency", 4)),
+        negative_ttl=int(server_config.get("negativeTtl", 30))
+    )
+
+    host = args.host or server_config.get("host", "127.0.0.1")
+    port = args.port or int(server_config.get("port", 8080))
+    server = ThreadingHTTPServer((host, port), create_handler(channels_by_slug, cache, ("master", "best", "ll", *profiles)))
+    print(f"=== Resolver listening on http://{host}:{port}/ ({len(channels)} channels) ===")
+    print(f"  Playlist: http://{host}:{port}/playlist.m3u")
+
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+        source_state.save()
+        print(f"\n=== Cache stats: {cache.stats} ===")
+
+
+if __name__ == "__main__":
+    main()
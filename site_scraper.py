@@ -0,0 +1,737 @@
+"""
+Shared scraping engine for the Turkish embed-player sites (mobiltv.net,
+ecanlitvizle.org, ...).
+
+Each site is described by a ``SiteProfile``: where its embed player lives,
+which domain a valid stream URL must contain, where the output goes and how
+its channels are discovered. ``SiteScraper`` owns the pooled HTTP session
+and everything the sites have in common: extracting and decoding the stream
+URLs, writing the per-channel m3u8 files and the site playlist.
+"""
+import hashlib
+import os
+import re
+import shutil
+import time
+from concurrent.futures import ThreadPoolExecutor
+from html import unescape
+from typing import Callable, Dict, List, Optional, Tuple
+from urllib.parse import urlparse
+
+import lxml.html
+import requests
+from bs4 import UnicodeDammit
+from lxml.etree import ParserError
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+
+from source_state import SourceState
+from state_file import load_state, save_state
+from video_cipher import DELIMITER, decode_many, decode_video_url
+
+GITHUB_USER = os.getenv("GITHUB_USER", "umitm0d")
+GITHUB_REPO = os.getenv("GITHUB_REPO", "Liveinlive")
+GITHUB_BRANCH = os.getenv("GITHUB_BRANCH", "main")
+BASE_URL = f"https://raw.githubusercontent.com/{GITHUB_USER}/{GITHUB_REPO}/refs/heads/{GITHUB_BRANCH}"
+
+USER_AGENT = "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/141.0.0.0 Safari/537.36"
+
+# (connect, read) seconds
+DEFAULT_TIMEOUT = (5, 20)
+DEFAULT_RETRIES = 3
+DEFAULT_POOL_SIZE = 10
+# Maximum number of requests in flight during crawls
+DEFAULT_WORKERS = 8
+# Number of alternative players ("yayin") tried per channel
+MAX_YAYIN = 3
+
+
+class SiteProfile:
+    """
+    Declarative description of one site.
+
+    Args:
+        name: Output folder and playlist name (e.g. "mobiltv-net")
+        web_url: Site home page, also sent as Referer
+        embed_url: Player URL template with {param} and {yayin} placeholders
+        domain: A decoded stream URL must contain this to be accepted
+        discover: Function taking the ``SiteScraper`` and returning
+            channel dicts with "name", "img" and "param"
+        refresh_param: Optional function taking the ``SiteScraper`` and a
+            channel dict and returning a freshly fetched param; called when
+            a param taken from a cache (channel "cached" is true) yields no
+            streams
+    """
+
+    def __init__(self, name: str, web_url: str, embed_url: str, domain: str,
+                 discover: Callable[["SiteScraper"], List[Dict[str, str]]],
+                 refresh_param: Optional[Callable[["SiteScraper", Dict[str, str]], Optional[str]]] = None):
+        self.name = name
+        self.web_url = web_url
+        self.embed_url = embed_url
+        self.domain = domain
+        self.discover = discover
+        self.refresh_param = refresh_param
+
+
+class ParamCache:
+    """
+    Disk-backed cache of values scraped from pages that rarely change
+    (e.g. a channel page's embed param), keyed by page URL.
+
+    Entries are ``{"param", "fetched_at", "etag", "last_modified"}``. Within
+    ``ttl`` seconds an entry is used without any request; after that the
+    page is revalidated with If-None-Match / If-Modified-Since when the site
+    sent validators.
+    """
+
+    def __init__(self, state_file: str, ttl: int = 7 * 86400):
+        self.state_file = state_file
+        self.ttl = ttl
+        self.state = load_state(state_file, "param cache")
+        self.stats = {"hit": 0, "revalidated": 0, "fetched": 0}
+
+    def save(self):
+        save_state(self.state_file, self.state)
+
+    def get(self, key: str) -> Optional[Dict]:
+        return self.state.get(key)
+
+    def is_fresh(self, key: str, now: Optional[float] = None) -> bool:
+        entry = self.state.get(key)
+        now = time.time() if now is None else now
+        return bool(entry) and now - entry.get("fetched_at", 0) < self.ttl
+
+    def conditional_headers(self, key: str) -> Dict[str, str]:
+        """Validator headers for revalidating a cached page (empty if none)"""
+        entry = self.state.get(key) or {}
+        headers = {}
+        if entry.get("etag"):
+            headers["If-None-Match"] = entry["etag"]
+        if entry.get("last_modified"):
+            headers["If-Modified-Since"] = entry["last_modified"]
+        return headers
+
+    def store(self, key: str, param: str, response: requests.Response):
+        self.stats["fetched"] += 1
+        self.state[key] = {
+            "param": param,
+            "fetched_at": int(time.time()),
+            "etag": response.headers.get("ETag"),
+            "last_modified": response.headers.get("Last-Modified")
+        }
+
+    def touch(self, key: str):
+        """Page answered 304 Not Modified: keep the param, restart the TTL"""
+        self.stats["revalidated"] += 1
+        self.state[key]["fetched_at"] = int(time.time())
+
+    def invalidate(self, key: str):
+        self.state.pop(key, None)
+
+
+class PlaylistCache:
+    """
+    Disk-backed record of the upstream master playlists behind the output
+    files, keyed by output path.
+
+    Entries are ``{"url", "sha256", "etag", "last_modified"}``. There is no
+    TTL: a playlist is always revalidated, and an entry is only rewritten
+    when one of its fields changes, so the committed state file stays the
+    same between runs that change nothing.
+    """
+
+    def __init__(self, state_file: str):
+        self.state_file = state_file
+        self.state = load_state(state_file, "playlist cache")
+        self.stats = {"hit": 0, "miss": 0}
+
+    def save(self):
+        save_state(self.state_file, self.state)
+
+    def get(self, path: str, url: str) -> Optional[Dict]:
+        """Entry of the output file if it was built from the same URL"""
+        entry = self.state.get(path)
+        return entry if entry and entry.get("url") == url else None
+
+    def conditional_headers(self, entry: Dict) -> Dict[str, str]:
+        """Validator headers for revalidating a cached playlist (empty if none)"""
+        headers = {}
+        if entry.get("etag"):
+            headers["If-None-Match"] = entry["etag"]
+        if entry.get("last_modified"):
+            headers["If-Modified-Since"] = entry["last_modified"]
+        return headers
+
+    def store(self, path: str, url: str, sha256: str, response: requests.Response):
+        self.state[path] = {
+            "url": url,
+            "sha256": sha256,
+            "etag": response.headers.get("ETag"),
+            "last_modified": response.headers.get("Last-Modified")
+        }
+
+    def invalidate(self, path: str):
+        self.state.pop(path, None)
+
+
+def create_session(referer: str, retries: int = DEFAULT_RETRIES, pool_size: int = DEFAULT_POOL_SIZE) -> requests.Session:
+    """
+    Create a keep-alive session that retries connection errors and 429/5xx responses.
+
+    Args:
+        referer: Referer header sent with every request
+        retries: Retry count per request (with exponential backoff)
+        pool_size: Connections kept open per host
+
+    Returns:
+        The configured session
+    """
+    retry = Retry(
+        total=retries,
+        backoff_factor=0.5,
+        status_forcelist=(429, 500, 502, 503, 504),
+        allowed_methods=frozenset(["GET", "HEAD"]),
+        raise_on_status=False
+    )
+    adapter = HTTPAdapter(pool_connections=pool_size, pool_maxsize=pool_size, max_retries=retry)
+    session = requests.Session()
+    session.mount("http://", adapter)
+    session.mount("https://", adapter)
+    session.headers.update({"Referer": referer})
+    return session
+
+
+def select_elements(content: bytes, xpath: str) -> Optional[list]:
+    """
+    Parse a page with lxml and return the elements matching an XPath.
+
+    Channel discovery only reads a few lists out of a large homepage; lxml
+    builds its tree in C, which is several times faster and lighter than a
+    full BeautifulSoup tree with ``html.parser``. The encoding is detected
+    the same way BeautifulSoup does it.
+
+    Args:
+        content: Raw page bytes
+        xpath: Expression selecting the wanted elements
+
+    Returns:
+        The matching elements, or None if lxml could not parse the page
+        (callers then fall back to BeautifulSoup)
+    """
+    try:
+        markup = UnicodeDammit(content, is_html=True).unicode_markup
+        if markup is None:
+            return None
+        return lxml.html.document_fromstring(markup).xpath(xpath)
+    except (ParserError, ValueError):
+        return None
+
+
+# Quote characters as they may appear in the raw page: literal or as an HTML
+# entity (html.unescape also accepts numeric and "quot" entities without ";").
+# "(?:;|(?!;))" takes the ";" whenever there is one, so a value can never
+# start with the entity's own semicolon.
+_SEMI = r"(?:;|(?!;))"
+_SQ_ENTITY = rf"#0*39(?![0-9]){_SEMI}|#[xX]0*27(?![0-9a-fA-F]){_SEMI}|apos;"
+_DQ_ENTITY = rf"#0*34(?![0-9]){_SEMI}|#[xX]0*22(?![0-9a-fA-F]){_SEMI}|quot{_SEMI}|QUOT{_SEMI}"
+_Q = rf"(?:['\"]|&(?:{_SQ_ENTITY}|{_DQ_ENTITY}))"
+# A quoted value: anything up to the next (possibly escaped) quote
+_VALUE = rf"(?:[^'\"&]|&(?!(?:{_SQ_ENTITY}|{_DQ_ENTITY})))+"
+_SQ = rf"(?:'|&(?:{_SQ_ENTITY}))"
+_DQ = rf"(?:\"|&(?:{_DQ_ENTITY}))"
+
+# File forms in priority order (the first form found anywhere in the page
+# wins, regardless of position)
+_FILE_FORMS = (
+    rf"(?i:file)\s*:\s*{_Q}(?P<file0>{_VALUE}){_Q}",
+    r"(?i:file)\s*:\s*&(?:amp|AMP);#039;(?P<file1>[^&#039;]+)&(?:amp|AMP);#039;",
+    rf"(?i:file)\s*=\s*{_Q}(?P<file2>{_VALUE}){_Q}",
+    rf"{_SQ}(?i:file){_SQ}\s*:\s*{_Q}(?P<file3>{_VALUE}){_Q}",
+    rf"{_DQ}(?i:file){_DQ}\s*:\s*{_Q}(?P<file4>{_VALUE}){_Q}",
+)
+# Candidates can overlap (a value may contain another "file:"), so every
+# token is matched inside a zero-width lookahead. The leading character class
+# lets the regex engine skip positions that cannot start any token instead
+# of trying every alternative there.
+STREAM_TOKEN_PATTERN = re.compile(
+    r"(?=[fF'\"&c])(?="
+    + "|".join(_FILE_FORMS + (
+        rf"(?P<kalite_token>{_Q}#kalite(?P<kalite>\d+){_Q})",
+        rf"(?P<video_token>changeVideo\({_Q}(?P<video>{_VALUE}){_Q}\))",
+    ))
+    + ")"
+)
+
+
+def extract_stream_candidates(html: str) -> Tuple[Optional[str], Dict[str, str]]:
+    """
+    Extract the file parameter and the quality options in a single pass.
+
+    Only the captured values are HTML-unescaped, not the whole document.
+    The result is the same as ``extract_file_from_html`` and
+    ``extract_quality_options`` on the unescaped page: the file form with
+    the highest priority wins, and each quality anchor is paired with the
+    first changeVideo call after it (anchors in between are skipped).
+
+    Args:
+        html: The embed page HTML
+
+    Returns:
+        Tuple of (file parameter or None, resolution -> encoded URL)
+    """
+    files = [None] * len(_FILE_FORMS)
+    qualities = {}
+    # (resolution, end of anchor) waiting for its changeVideo call
+    pending_quality = None
+    quality_end = 0
+
+    for match in STREAM_TOKEN_PATTERN.finditer(html):
+        if match.group("kalite_token") is not None:
+            if pending_quality is None and match.start() >= quality_end:
+                pending_quality = (match.group("kalite"), match.end("kalite_token"))
+        elif match.group("video_token") is not None:
+            if pending_quality is not None and match.start() >= pending_quality[1]:
+                qualities[pending_quality[0]] = unescape(match.group("video")).strip()
+                pending_quality = None
+                quality_end = match.end("video_token")
+        else:
+            index = next(index for index in range(len(files)) if match.group(f"file{index}") is not None)
+            if files[index] is None:
+                files[index] = unescape(match.group(f"file{index}")).strip()
+
+    file_value = next((value for value in files if value is not None), None)
+    return file_value, qualities
+
+
+def extract_file_from_html(html: str) -> Optional[str]:
+    """
+    Extract the file parameter from HTML content.
+
+    Args:
+        html: The HTML content containing the file parameter
+
+    Returns:
+        The extracted file parameter value, or None if not found
+    """
+    return extract_stream_candidates(html)[0]
+
+
+def extract_quality_options(html: str) -> Dict[str, str]:
+    """
+    Extract quality options from HTML content.
+
+    Args:
+        html: The HTML content containing quality options
+
+    Returns:
+        Dictionary mapping resolution (e.g., "720", "480") to encoded URL
+    """
+    return extract_stream_candidates(html)[1]
+
+
+def decode_all_qualities(qualities: Dict[str, str]) -> Dict[str, str]:
+    """
+    Decode all quality options.
+
+    Args:
+        qualities: Dictionary mapping resolution to encoded URL
+
+    Returns:
+        Dictionary mapping resolution to decoded URL
+    """
+    decoded_urls = decode_many(qualities.values())
+
+    return {
+        resolution: decoded_url
+        for resolution, decoded_url in zip(qualities, decoded_urls)
+        if decoded_url
+    }
+
+
+def select_best_quality(decoded_qualities: Dict[str, str],
+                        preferred_quality: Optional[str] = None) -> tuple[str, str]:
+    """
+    Select the best quality from available options.
+
+    Args:
+        decoded_qualities: Dictionary mapping resolution to decoded URL
+        preferred_quality: Optional preferred quality (e.g., "720")
+
+    Returns:
+        Tuple of (selected_quality, url)
+    """
+    if not decoded_qualities:
+        return None, None
+
+    # If preferred quality is specified and available, use it
+    if preferred_quality and preferred_quality in decoded_qualities:
+        return preferred_quality, decoded_qualities[preferred_quality]
+
+    # Priority: 1080 > 720 > 480 > 360 > any other
+    quality_priority = ['1080', '720', '480', '360']
+
+    for quality in quality_priority:
+        if quality in decoded_qualities:
+            return quality, decoded_qualities[quality]
+
+    # If none of the priority qualities exist, use the highest available
+    sorted_qualities = sorted(decoded_qualities.keys(), key=lambda x: int(x), reverse=True)
+    best_quality = sorted_qualities[0]
+    return best_quality, decoded_qualities[best_quality]
+
+
+def extract_stream_urls(html: str) -> List[Optional[str]]:
+    """
+    Extract and decode every stream URL from an embed page.
+
+    Args:
+        html: The embed page HTML
+
+    Returns:
+        Decoded quality URLs, or the single decoded "file" URL when the
+        page has no quality options
+    """
+    stream, streams = extract_stream_candidates(html)
+    decoded_streams = list(decode_all_qualities(streams).values())
+    if not streams:
+        decoded_streams.append(decode_video_url(stream) if stream and DELIMITER in stream else stream)
+    return decoded_streams
+
+
+def file_hash(path: str) -> Optional[str]:
+    """sha256 of a file's content, or None if it cannot be read"""
+    try:
+        with open(path, "rb") as f:
+            return hashlib.sha256(f.read()).hexdigest()
+    except OSError:
+        return None
+
+
+def replace_file(path: str, content: str) -> bool:
+    """
+    Atomically replace a file unless it already has this content.
+
+    Returns:
+        True if the file was written
+    """
+    data = content.encode("utf-8")
+    if file_hash(path) == hashlib.sha256(data).hexdigest():
+        return False
+    temp_file = f"{path}.tmp"
+    with open(temp_file, "wb") as f:
+        f.write(data)
+    os.replace(temp_file, path)
+    return True
+
+
+class OutputWriter:
+    """
+    Incremental writer for a scraper's output folder.
+
+    Files of a run are compared with the live folder by content hash; only
+    new and changed ones are written, into a staging directory next to the
+    folder. ``commit`` moves them into place with ``os.replace`` (atomic per
+    file) and removes the live files the run did not produce. The published
+    folder is never empty or half-written, and unchanged files are not
+    touched, so git only sees real changes.
+    """
+
+    def __init__(self, folder: str):
+        self.folder = folder
+        self.staging = f"{folder.rstrip(os.sep)}.staging"
+        # file name -> "added" / "changed"; unchanged files are only in produced
+        self.staged = {}
+        self.produced = set()
+        shutil.rmtree(self.staging, ignore_errors=True)
+        os.makedirs(self.staging)
+        os.makedirs(folder, exist_ok=True)
+
+    def path(self, file_name: str) -> str:
+        """Live path of an output file"""
+        return os.path.join(self.folder, file_name)
+
+    def exists(self, file_name: str) -> bool:
+        return os.path.isfile(self.path(file_name))
+
+    def keep(self, file_name: str):
+        """Keep the live file as it is (known to be up to date)"""
+        self.produced.add(file_name)
+        self.staged.pop(file_name, None)
+
+    def write(self, file_name: str, content: str):
+        """Stage a file unless the live copy already has this content"""
+        self.produced.add(file_name)
+        data = content.encode("utf-8")
+        live_hash = file_hash(self.path(file_name))
+        if live_hash == hashlib.sha256(data).hexdigest():
+            self.staged.pop(file_name, None)
+            return
+        with open(os.path.join(self.staging, file_name), "wb") as f:
+            f.write(data)
+        self.staged[file_name] = "added" if live_hash is None else "changed"
+
+    def commit(self) -> Dict[str, int]:
+        """
+        Move the staged files into the live folder and remove the files
+        this run did not produce.
+
+        Returns:
+            Counts of added, changed, removed and unchanged files
+        """
+        for file_name in self.staged:
+            os.replace(os.path.join(self.staging, file_name), self.path(file_name))
+        removed = 0
+        for file_name in set(os.listdir(self.folder)) - self.produced:
+            path = self.path(file_name)
+            if os.path.isdir(path):
+                shutil.rmtree(path, ignore_errors=True)
+            else:
+                os.remove(path)
+            removed += 1
+        shutil.rmtree(self.staging, ignore_errors=True)
+
+        statuses = list(self.staged.values())
+        return {
+            "added": statuses.count("added"),
+            "changed": statuses.count("changed"),
+            "removed": removed,
+            "unchanged": len(self.produced) - len(statuses)
+        }
+
+
+class SiteScraper:
+    """
+    Runs a ``SiteProfile``: discovers channels, resolves their stream URLs
+    and writes ``<name>/<slug>.m3u8`` files plus ``playlists/<name>.m3u``.
+
+    Every request goes through one pooled session with explicit timeouts
+    and retries; ``get_many`` keeps at most ``workers`` requests in flight.
+    The player ("yayin") that served each channel is remembered in
+    ``state/<name>-mirrors.json`` and tried first on the next run.
+    """
+
+    def __init__(self, profile: SiteProfile, timeout=DEFAULT_TIMEOUT, retries: int = DEFAULT_RETRIES,
+                 pool_size: int = DEFAULT_POOL_SIZE, workers: int = DEFAULT_WORKERS, probe: str = "parallel"):
+        self.profile = profile
+        self.timeout = timeout
+        self.workers = workers
+        self.probe = probe
+        self.session = create_session(profile.web_url, retries, max(pool_size, workers))
+        self.mirror_state = SourceState(os.path.join("state", f"{profile.name}-mirrors.json"))
+        # Upstream master playlists of single-stream channels, keyed by output
+        # path: source URL, validators and body hash, always revalidated (ttl=0)
+        self.playlist_cache = PlaylistCache(os.path.join("state", f"{profile.name}-playlists.json"))
+
+    def get(self, url: str, **kwargs) -> requests.Response:
+        """GET through the pooled session with the default timeout"""
+        kwargs.setdefault("timeout", self.timeout)
+        return self.session.get(url, **kwargs)
+
+    def get_many(self, urls: List[str], headers: Optional[List[Dict[str, str]]] = None) -> List[Optional[requests.Response]]:
+        """
+        GET several URLs concurrently with at most ``workers`` in flight.
+
+        Args:
+            urls: URLs to fetch
+            headers: Optional extra headers per URL (same order as ``urls``)
+
+        Returns:
+            Responses in the same order as ``urls``; None for requests that failed
+        """
+        def fetch(url, extra_headers):
+            try:
+                return self.get(url, headers=extra_headers)
+            except requests.RequestException as e:
+                print(f"Failed to fetch {url}: {e}")
+                return None
+
+        headers = headers or [None] * len(urls)
+        if len(urls) <= 1 or self.workers <= 1:
+            return [fetch(url, extra_headers) for url, extra_headers in zip(urls, headers)]
+        with ThreadPoolExecutor(max_workers=self.workers) as executor:
+            return list(executor.map(fetch, urls, headers))
+
+    def probe_mirror(self, url: str) -> Optional[List[str]]:
+        """
+        Fetch one player page and decode its streams.
+
+        Returns:
+            Decoded stream URLs if they point to the site's own domain, else None
+        """
+        try:
+            r = self.get(url)
+            decoded_streams = extract_stream_urls(r.text)
+            if decoded_streams and decoded_streams[0] and self.profile.domain in decoded_streams[0]:
+                return decoded_streams
+        except Exception as e:
+            print(f"Error extracting streams from {url}: {e}")
+        return None
+
+    def probe_parallel(self, urls: List[str]) -> Optional[tuple]:
+        """Request all players at once; return (url, streams) of the first valid one in ``urls`` order"""
+        executor = ThreadPoolExecutor(max_workers=len(urls))
+        try:
+            futures = [executor.submit(self.probe_mirror, url) for url in urls]
+            results = ((url, future.result()) for url, future in zip(urls, futures))
+            return next(((url, streams) for url, streams in results if streams), None)
+        finally:
+            # Lower-ranked players still loading are not waited for
+            executor.shutdown(wait=False, cancel_futures=True)
+
+    def get_stream_urls(self, param: str) -> Optional[List[str]]:
+        """
+        Resolve a channel's stream URLs from players 1..MAX_YAYIN.
+
+        Players are ranked by priority (1, 2, 3) with the last winner for this
+        channel moved to the front. In "parallel" probe mode the remembered
+        winner is tried alone first; if there is none or it fails, the
+        remaining players are requested at once and the best-ranked valid
+        result is returned as soon as every higher-ranked player has failed.
+        In "sequential" mode they are tried one after another.
+
+        Args:
+            param: The channel's embed parameter
+
+        Returns:
+            Decoded stream URLs from the best-ranked player that serves the
+            site's own domain, or None
+        """
+        urls = [self.profile.embed_url.format(param=param, yayin=yayin) for yayin in range(1, MAX_YAYIN + 1)]
+        remembered = (self.mirror_state.state.get(param) or {}).get("url") in urls
+        urls = self.mirror_state.order(param, urls)
+        started = time.monotonic()
+
+        if self.probe == "parallel":
+            winner = None
+            if remembered:
+                streams = self.probe_mirror(urls[0])
+                winner = (urls[0], streams) if streams else None
+                urls = urls[1:]
+            if winner is None and urls:
+                winner = self.probe_parallel(urls)
+        else:
+            results = ((url, self.probe_mirror(url)) for url in urls)
+            winner = next(((url, streams) for url, streams in results if streams), None)
+
+        if winner is None:
+            return None
+        url, decoded_streams = winner
+        self.mirror_state.record(param, url, time.monotonic() - started)
+        print(decoded_streams)
+        return decoded_streams
+
+    def save_file(self, output: OutputWriter, file_name: str, streams: List[str]) -> str:
+        """
+        Write the channel's m3u8 file through the run's ``OutputWriter``.
+
+        A single URL that points to a master playlist is copied with relative
+        URIs made absolute; otherwise a master playlist listing the URLs is
+        written.
+
+        The upstream playlist is fetched conditionally (ETag / Last-Modified
+        from ``playlist_cache``) while the file from the last run exists; on
+        304 Not Modified or an identical body the file is kept as it is.
+
+        Returns:
+            "success", or "" on failure
+        """
+        path = output.path(file_name)
+        try:
+            if len(streams) == 1:
+                url = streams[0]
+                cached = self.playlist_cache.get(path, url) if output.exists(file_name) else None
+                r = self.get(url, headers=self.playlist_cache.conditional_headers(cached) if cached else None)
+                if r.status_code == 304 and cached:
+                    self.playlist_cache.stats["hit"] += 1
+                    output.keep(file_name)
+                    return "success"
+                if r.status_code != 200:
+                    print(f"Failed to fetch stream URL: {url}")
+                    return ""
+                digest = hashlib.sha256(r.content).hexdigest()
+                if cached and cached.get("sha256") == digest:
+                    # Same body; the entry only changes if the validators did
+                    self.playlist_cache.store(path, url, digest, r)
+                    self.playlist_cache.stats["hit"] += 1
+                    output.keep(file_name)
+                    return "success"
+                self.playlist_cache.stats["miss"] += 1
+                if "EXT-X-STREAM-INF" in r.text:
+                    lines = []
+                    for line in r.text.splitlines():
+                        if not line.startswith("#") and "http" not in line:
+                            base_url = url.rsplit("/", 1)[0]
+                            line = f"{base_url}/{line}"
+                        lines.append(line)
+                    content = "".join(f"{line}\n" for line in lines)
+                else:
+                    content = (
+                        "#EXTM3U\n"
+                        "#EXT-X-VERSION:3\n"
+                        "#EXT-X-STREAM-INF:PROGRAM-ID=1,BANDWIDTH=800000\n"
+                        f"{url}\n"
+                    )
+            elif len(streams) > 1:
+                bw_list = ["800000", "1200000", "1800000", "2500000", "3000000"]
+                content = "#EXTM3U\n" + "".join(
+                    f"#EXT-X-STREAM-INF:PROGRAM-ID=1,BANDWIDTH={bw_list[i]}\n{url}\n"
+                    for i, url in enumerate(streams)
+                )
+            else:
+                return ""
+
+            output.write(file_name, content)
+            if len(streams) == 1:
+                # Only remembered once the file is written
+                self.playlist_cache.store(path, url, digest, r)
+            else:
+                self.playlist_cache.invalidate(path)
+            return "success"
+        except Exception as e:
+            print(f"Error creating file {path}: {e}")
+            return ""
+
+    def run(self):
+        """Discover all channels and write the output folder and playlist"""
+        name = self.profile.name
+        kanallar = self.profile.discover(self)
+        # The live folder stays in place during the run; changes are staged
+        # and swapped in at the end
+        output = OutputWriter(name)
+        os.makedirs("playlists", exist_ok=True)
+        playlist_file_path = os.path.join("playlists", f"{name}.m3u")
+        playlist = ["#EXTM3U\n"]
+
+        for kanal in kanallar:
+            print(f"Channel: {kanal['name']}")
+            stream_urls = self.get_stream_urls(kanal['param'])
+            if not stream_urls and self.profile.refresh_param and kanal.get("cached"):
+                # The cached param may be stale; fetch it again and retry once
+                param = self.profile.refresh_param(self, kanal)
+                if param and param != kanal['param']:
+                    print(f"Retrying with refreshed param: {param}")
+                    stream_urls = self.get_stream_urls(param)
+            if stream_urls:
+                channel_slug = urlparse(stream_urls[0]).path.split('/')[-1].split('.')[0].replace("-master", "")
+                file_name = f"{channel_slug}.m3u8"
+                result = self.save_file(output, file_name, stream_urls)
+                if result == "success":
+                    github_url = f"{BASE_URL}/{name}/{file_name}"
+                    playlist.append(f'#EXTINF:-1 tvg-id="" tvg-name="{kanal["name"]}" tvg-logo="{kanal["img"]}",{kanal["name"]}\n')
+                    playlist.append(f"#EXTVLCOPT:http-user-agent={USER_AGENT}\n")
+                    playlist.append(f"{github_url}\n")
+
+        counts = output.commit()
+        replace_file(playlist_file_path, "".join(playlist))
+        print(f"Output {name}/: {counts['added']} added, {counts['changed']} changed, "
+              f"{counts['removed']} removed, {counts['unchanged']} unchanged")
+
+        # Drop entries of files that were not produced this run
+        used = {output.path(file_name) for file_name in output.produced}
+        for path in set(self.playlist_cache.state) - used:
+            self.playlist_cache.invalidate(path)
+        self.playlist_cache.save()
+        self.mirror_state.save()
+        print(f"Upstream playlist cache: {self.playlist_cache.stats['hit']} hit, {self.playlist_cache.stats['miss']} miss")
+        print("Playlist generation completed!")
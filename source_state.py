@@ -0,0 +1,45 @@
+import threading
+import time
+
+from state_file import load_state, save_state
+
+
+class SourceState:
+    """Birden fazla kaynağı olan kanallarda en son kazanan kaynağı hatırlar.
+
+    Durum JSON dosyasında ``{slug: {"url", "elapsed", "updated_at"}}`` şeklinde
+    saklanır; bir sonraki çalıştırmada kazanan kaynak listenin başına alınır.
+    Kayıt yalnızca kazanan değiştiğinde yazılır (süre ve zaman o ana aittir),
+    böylece commit'lenen durum dosyası her çalıştırmada değişmez.
+    """
+
+    def __init__(self, state_file):
+        self.state_file = state_file
+        self._lock = threading.Lock()
+        self.state = load_state(state_file, "source state")
+
+    def save(self):
+        with self._lock:
+            save_state(self.state_file, self.state)
+
+    def preferred(self, slug):
+        """Son kazanan kaynak (yoksa None)"""
+        with self._lock:
+            return (self.state.get(slug) or {}).get("url")
+
+    def order(self, slug, urls):
+        """Son kazanan kaynağı başa al, diğerlerinin sırasını koru"""
+        preferred = self.preferred(slug)
+        if preferred not in urls:
+            return list(urls)
+        return [preferred] + [url for url in urls if url != preferred]
+
+    def record(self, slug, url, elapsed):
+        with self._lock:
+            if (self.state.get(slug) or {}).get("url") == url:
+                return
+            self.state[slug] = {
+                "url": url,
+                "elapsed": round(elapsed, 3),
+                "updated_at": int(time.time())
+            }
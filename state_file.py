@@ -0,0 +1,26 @@
+import json
+import os
+
+
+def load_state(state_file, label="state"):
+    """JSON durum dosyasını oku; yoksa ya da bozuksa boş sözlük döndür"""
+    if not os.path.isfile(state_file):
+        return {}
+    try:
+        with open(state_file, "r", encoding="utf-8") as f:
+            state = json.load(f)
+        return state if isinstance(state, dict) else {}
+    except (OSError, ValueError) as e:
+        print(f"⚠️  Could not read {label} {state_file}: {e}")
+        return {}
+
+
+def save_state(state_file, state):
+    """Durumu geçici dosyaya yazıp atomik olarak yerine taşı"""
+    directory = os.path.dirname(state_file)
+    if directory:
+        os.makedirs(directory, exist_ok=True)
+    temp_file = f"{state_file}.tmp"
+    with open(temp_file, "w", encoding="utf-8") as f:
+        json.dump(state, f, indent=2, sort_keys=True)
+    os.replace(temp_file, state_file)
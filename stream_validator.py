@@ -0,0 +1,490 @@
+"""
+playlist_generator.py için asenkron yayın doğrulayıcı.
+
+Binlerce kontrol aynı anda yürütülebilir: bağlantılar host başına havuzda
+tutulup yeniden kullanılır (keep-alive), host başına bağlantı sayısı ve
+saniyedeki toplam istek sayısı sınırlıdır. Geçerli/geçersiz kararları eski
+thread'li check_stream ile aynıdır. Sonuçlar çalıştırmalar arasında
+ValidationCache'te saklanır; aynı URL için eşzamanlı kontroller tek isteğe
+indirilir.
+
+"budget" kontrol modunda HEAD isteği yapılmaz ve playlist gövdesi bayt
+bütçesiyle okunur: #EXTM3U ve ilk varyant/segment URI'si görülünce okuma
+durur. Okunan baytlar kontrol başına ve toplam olarak sayılır.
+
+HostHealth host başına yanıt sürelerini ve art arda hataları tutar: istek
+zaman aşımı host'un gözlenen p95 süresinden türetilir, art arda hata veren
+host'un devresi açılır ve kalan URL'leri istek yapılmadan geçersiz sayılır
+(yalnızca ara sıra bir deneme isteği geçer). Durum çalıştırmalar arasında
+saklanır.
+"""
+import asyncio
+import os
+import re
+import time
+from urllib.parse import urljoin, urlsplit
+
+import aiohttp
+
+from state_file import load_state, save_state
+
+HEADERS = {
+    'User-Agent': 'Mozilla/5.0',
+    'Accept': '*/*',
+    'Referer': 'https://www.google.com/'
+}
+MEDIA_TYPES = ('video/', 'audio/', 'application/octet-stream', 'application/vnd.apple.mpegurl')
+VARIANT_PATTERN = re.compile(r'\n([^\n\.]+\.m3u8[^\n]*)')
+
+DEFAULT_TIMEOUT = 8
+# Aynı anda yürütülen kontrol sayısı
+DEFAULT_MAX_IN_FLIGHT = 1000
+# Host başına açık bağlantı sayısı
+DEFAULT_PER_HOST = 10
+# Saniyede başlatılan toplam istek sayısı (0: sınırsız)
+DEFAULT_RATE = 500
+# "full": eski check_stream (HEAD + tüm gövde), "budget": HEAD'siz, bayt bütçeli
+PROBE_MODES = ("full", "budget")
+# "budget" modunda bir playlist'ten okunacak en fazla bayt
+DEFAULT_BYTE_BUDGET = 32 * 1024
+READ_CHUNK_SIZE = 4096
+
+VALIDATION_CACHE_FILE = os.path.join("state", "stream-validation.json")
+# Çalıştırmalar 4 saatte bir: geçerli sonuçlar iki, geçersizler üç çalıştırmada bir yeniden kontrol edilir
+POSITIVE_TTL = 6 * 3600
+NEGATIVE_TTL = 12 * 3600
+
+HOST_HEALTH_FILE = os.path.join("state", "stream-hosts.json")
+# Devrenin açılması için art arda bağlantı hatası / zaman aşımı sayısı
+BREAKER_THRESHOLD = 5
+# Açık devrede deneme istekleri arası süre (saniye)
+TRIAL_INTERVAL = 10
+# Bu süreden uzun açık kalan devre sonraki çalıştırmada kapalı başlar
+BREAKER_RESET = 24 * 3600
+# Bu süredir istek yapılmayan host'ların kaydı silinir
+HOST_TTL = 7 * 24 * 3600
+# Host başına saklanan son yanıt süresi sayısı
+LATENCY_SAMPLES = 50
+# p95'ten zaman aşımı türetmek için gereken en az örnek
+MIN_LATENCY_SAMPLES = 10
+# Zaman aşımı = p95 x çarpan, en az MIN_TIMEOUT, en çok doğrulayıcının timeout'u
+TIMEOUT_FACTOR = 3
+MIN_TIMEOUT = 2
+
+
+class HostUnavailable(Exception):
+    """Host'un devresi açık, istek yapılmadı"""
+
+
+def host_key(url):
+    """Devre ve süre takibinde kullanılan host (port dahil)"""
+    return urlsplit(url).netloc.lower()
+
+
+def decode_text(data, charset):
+    """Kısmi gövdeyi çöz (aiohttp'nin get_encoding'i tamamı okunmamış gövdede çalışmaz)"""
+    try:
+        return data.decode(charset or "utf-8", errors="replace")
+    except LookupError:
+        return data.decode("utf-8", errors="replace")
+
+
+class RateLimiter:
+    """Global hız sınırı: istekleri 1/rate saniye aralıklarla başlatır"""
+
+    def __init__(self, rate):
+        self.interval = 1.0 / rate if rate else 0.0
+        self.next_slot = 0.0
+
+    async def wait(self):
+        if not self.interval:
+            return
+        now = asyncio.get_running_loop().time()
+        slot = max(now, self.next_slot)
+        self.next_slot = slot + self.interval
+        if slot > now:
+            await asyncio.sleep(slot - now)
+
+
+class ValidationCache:
+    """URL başına doğrulama sonucu: karar, dönen URL, HTTP durumu, süre ve zaman"""
+
+    def __init__(self, state_file=VALIDATION_CACHE_FILE, positive_ttl=POSITIVE_TTL, negative_ttl=NEGATIVE_TTL):
+        self.state_file = state_file
+        self.positive_ttl = positive_ttl
+        self.negative_ttl = negative_ttl
+        self.state = load_state(state_file, "validation cache")
+
+    def is_fresh(self, entry, now=None):
+        now = time.time() if now is None else now
+        ttl = self.positive_ttl if entry.get("valid") else self.negative_ttl
+        return now - entry.get("checked_at", 0) < ttl
+
+    def get(self, url):
+        """Süresi dolmamış kayıt ya da None"""
+        entry = self.state.get(url)
+        return entry if entry and self.is_fresh(entry) else None
+
+    def store(self, url, is_valid, result_url, status, latency, bytes_read=0):
+        self.state[url] = {
+            "valid": is_valid,
+            "url": result_url,
+            "status": status,
+            "latency": round(latency, 3),
+            "bytes": bytes_read,
+            "checked_at": int(time.time())
+        }
+
+    def save(self):
+        """Süresi dolmuş kayıtları at ve kaydet"""
+        now = time.time()
+        self.state = {url: entry for url, entry in self.state.items() if self.is_fresh(entry, now)}
+        save_state(self.state_file, self.state)
+
+
+class HostHealth:
+    """Host başına son yanıt süreleri, art arda hatalar ve devre durumu"""
+
+    def __init__(self, state_file=HOST_HEALTH_FILE, threshold=BREAKER_THRESHOLD,
+                 trial_interval=TRIAL_INTERVAL, max_timeout=DEFAULT_TIMEOUT):
+        self.state_file = state_file
+        self.threshold = threshold
+        self.trial_interval = trial_interval
+        self.max_timeout = max_timeout
+        self.state = load_state(state_file, "host health") if state_file else {}
+        now = time.time()
+        for entry in self.state.values():
+            if entry.get("opened_at") and now - entry["opened_at"] >= BREAKER_RESET:
+                entry["opened_at"] = None
+                entry["failures"] = 0
+        # host -> son deneme isteğinin zamanı (yalnızca bu çalıştırmada)
+        self.last_trial = {}
+        # Bu çalıştırmada devresi açılan host'lar
+        self.opened = set()
+        self.stats = {"short_circuited": 0, "trials": 0}
+
+    def entry(self, host):
+        return self.state.setdefault(host, {"latencies": [], "failures": 0, "opened_at": None})
+
+    def is_open(self, host):
+        entry = self.state.get(host)
+        return bool(entry and entry.get("opened_at"))
+
+    def allow(self, host):
+        """İstek yapılabilir mi; açık devrede trial_interval'da bir deneme isteği geçer"""
+        if not self.is_open(host):
+            return True
+        now = time.monotonic()
+        if now - self.last_trial.get(host, float("-inf")) >= self.trial_interval:
+            self.last_trial[host] = now
+            self.stats["trials"] += 1
+            return True
+        self.stats["short_circuited"] += 1
+        return False
+
+    def timeout_for(self, host):
+        """Gözlenen p95 yanıt süresinden türetilen zaman aşımı; yeterli örnek yoksa max_timeout"""
+        latencies = self.state.get(host, {}).get("latencies", [])
+        if len(latencies) < MIN_LATENCY_SAMPLES:
+            return self.max_timeout
+        ordered = sorted(latencies)
+        p95 = ordered[min(len(ordered) - 1, int(len(ordered) * 0.95))]
+        return min(self.max_timeout, max(MIN_TIMEOUT, p95 * TIMEOUT_FACTOR))
+
+    def record_success(self, host, latency):
+        """Host yanıt verdi (HTTP durumu ne olursa olsun): devreyi kapat"""
+        entry = self.entry(host)
+        entry["latencies"] = (entry["latencies"] + [round(latency, 3)])[-LATENCY_SAMPLES:]
+        entry["failures"] = 0
+        entry["opened_at"] = None
+        entry["checked_at"] = int(time.time())
+
+    def record_failure(self, host):
+        entry = self.entry(host)
+        entry["failures"] += 1
+        entry["checked_at"] = int(time.time())
+        if entry["failures"] >= self.threshold and not entry["opened_at"]:
+            entry["opened_at"] = int(time.time())
+            self.opened.add(host)
+
+    def open_hosts(self):
+        return sorted(host for host in self.state if self.is_open(host))
+
+    def save(self):
+        """Uzun süredir görülmeyen host'ları at ve kaydet"""
+        if not self.state_file:
+            return
+        now = time.time()
+        self.state = {host: entry for host, entry in self.state.items()
+                      if now - entry.get("checked_at", 0) < HOST_TTL}
+        save_state(self.state_file, self.state)
+
+
+class StreamValidator:
+    """Yayın URL'lerini tek bir aiohttp oturumu üzerinden doğrular"""
+
+    def __init__(self, timeout=DEFAULT_TIMEOUT, max_attempts=1, max_in_flight=DEFAULT_MAX_IN_FLIGHT,
+                 per_host=DEFAULT_PER_HOST, rate=DEFAULT_RATE, cache=None, probe_mode="full",
+                 byte_budget=DEFAULT_BYTE_BUDGET, hosts=None):
+        if probe_mode not in PROBE_MODES:
+            raise ValueError(f"Unknown probe mode: {probe_mode}")
+        self.timeout = timeout
+        self.max_attempts = max_attempts
+        self.max_in_flight = max_in_flight
+        self.per_host = per_host
+        self.limiter = RateLimiter(rate)
+        self.cache = cache
+        # URL -> sürmekte olan kontrol; aynı URL'yi isteyenler bunu bekler
+        self.in_flight = {}
+        # Master URL -> beklediği varyant URL'si (döngü tespiti için)
+        self.waiting_on = {}
+        self.probe_mode = probe_mode
+        self.byte_budget = byte_budget
+        self.stats = {"hit": 0, "miss": 0, "coalesced": 0, "bytes": 0}
+        # URL -> bu URL'nin kontrolünde okunan gövde baytları (varyant kendi URL'sine sayılır)
+        self.probe_bytes = {}
+        # Host sağlığı ve devre kesici (None: her istekte sabit timeout)
+        self.hosts = hosts
+        # host -> ClientTimeout (türetilen süreye göre)
+        self.host_timeouts = {}
+        # host -> yanıt başlığı beklenen istek sınırı; devre, istek sırası gelince kontrol edilir
+        self.host_slots = {}
+
+    def create_session(self):
+        """Host başına sınırlı, keep-alive bağlantı havuzlu oturum (TLS doğrulaması kapalı)"""
+        connector = aiohttp.TCPConnector(
+            limit=self.max_in_flight,
+            limit_per_host=self.per_host,
+            ssl=False,
+            ttl_dns_cache=300
+        )
+        # requests'in timeout'u gibi: bağlantı kurma ve okuma arası süre sınırı
+        timeout = aiohttp.ClientTimeout(total=None, sock_connect=self.timeout, sock_read=self.timeout)
+        return aiohttp.ClientSession(connector=connector, timeout=timeout, headers=HEADERS)
+
+    async def request(self, session, method, url, **kwargs):
+        if self.hosts is None:
+            await self.limiter.wait()
+            return await session.request(method, url, **kwargs)
+        host = host_key(url)
+        if host not in self.host_slots:
+            self.host_slots[host] = asyncio.Semaphore(self.per_host)
+        # Bağlantı havuzunda sıra beklerken açılan devre de bu istekleri durdurur
+        async with self.host_slots[host]:
+            if not self.hosts.allow(host):
+                raise HostUnavailable(host)
+            timeout = self.hosts.timeout_for(host)
+            if host not in self.host_timeouts or self.host_timeouts[host].sock_read != timeout:
+                self.host_timeouts[host] = aiohttp.ClientTimeout(total=None, sock_connect=timeout, sock_read=timeout)
+            await self.limiter.wait()
+            started = asyncio.get_running_loop().time()
+            try:
+                response = await session.request(method, url, timeout=self.host_timeouts[host], **kwargs)
+            except (aiohttp.ClientConnectionError, asyncio.TimeoutError):
+                self.hosts.record_failure(host)
+                raise
+            self.hosts.record_success(host, asyncio.get_running_loop().time() - started)
+            return response
+
+    def count_bytes(self, url, size):
+        self.probe_bytes[url] = self.probe_bytes.get(url, 0) + size
+        self.stats["bytes"] += size
+
+    async def check(self, session, url, max_attempts=None):
+        """
+        Tek bir URL'yi kontrol et (önce önbellek, sonra sürmekte olan aynı kontrol).
+        (geçerli mi, url) döndürür; master playlist'te ilk varyantın URL'si.
+        """
+        if self.cache is not None:
+            entry = self.cache.get(url)
+            if entry:
+                self.stats["hit"] += 1
+                return entry["valid"], entry["url"]
+        task = self.in_flight.get(url)
+        if task is None:
+            self.stats["miss"] += 1
+            task = asyncio.ensure_future(self.probe(session, url, max_attempts))
+            self.in_flight[url] = task
+            task.add_done_callback(lambda _: self.in_flight.pop(url, None))
+        else:
+            self.stats["coalesced"] += 1
+        return await task
+
+    async def probe(self, session, url, max_attempts=None):
+        """Ağ üzerinden kontrol et ve sonucu önbelleğe yaz"""
+        started = asyncio.get_running_loop().time()
+        try:
+            if self.probe_mode == "budget":
+                is_valid, result_url, status = await self.fetch_verdict_budget(session, url, max_attempts)
+            else:
+                is_valid, result_url, status = await self.fetch_verdict(session, url, max_attempts)
+        except HostUnavailable:
+            # Devre açık: erişilemez say, önbelleğe yazma (host düzelince yeniden kontrol edilsin)
+            return False, url
+        if self.cache is not None:
+            self.cache.store(url, is_valid, result_url, status, asyncio.get_running_loop().time() - started,
+                             self.probe_bytes.get(url, 0))
+        return is_valid, result_url
+
+    async def check_variant(self, session, url, variant_url):
+        """Master playlist'in varyantını kontrol et; birbirini bekleyen master'lar geçersizdir"""
+        if self.would_cycle(url, variant_url):
+            # Eski özyineleme burada RecursionError ile False dönerdi
+            return False, variant_url
+        self.waiting_on[url] = variant_url
+        try:
+            return await self.check(session, variant_url, 1)
+        finally:
+            self.waiting_on.pop(url, None)
+
+    async def fetch_verdict(self, session, url, max_attempts=None):
+        """Eski check_stream'in kararı; (geçerli mi, url, son HTTP durumu) döndürür"""
+        max_attempts = self.max_attempts if max_attempts is None else max_attempts
+        status = None
+        for attempt in range(max_attempts):
+            try:
+                if url.endswith(('.m3u8', '.m3u')):
+                    # Check playlist
+                    async with await self.request(session, "HEAD", url) as response:
+                        status = response.status
+                        if response.status != 200:
+                            return False, url, status
+                    # Fetch full playlist for m3u8
+                    if url.endswith('.m3u8'):
+                        async with await self.request(session, "GET", url) as response:
+                            status = response.status
+                            body = await response.read() if response.status == 200 else b""
+                            self.count_bytes(url, len(body))
+                            text = body.decode(response.get_encoding(), errors="replace") if body else ""
+                        if response.status == 200 and '#EXTM3U' in text:
+                            if '#EXT-X-STREAM-INF' in text:
+                                variants = VARIANT_PATTERN.findall(text)
+                                if variants:
+                                    variant_url = variants[0]
+                                    if not variant_url.startswith('http'):
+                                        variant_url = urljoin(url, variant_url)
+                                    is_valid, variant_url = await self.check_variant(session, url, variant_url)
+                                    return is_valid, variant_url, status
+                            return True, url, status
+                        else:
+                            return False, url, status
+                else:
+                    # Direct video/audio
+                    async with await self.request(session, "GET", url, headers={'Range': 'bytes=0-1024'}) as response:
+                        status = response.status
+                        if response.status in (200, 206):
+                            chunk = await response.content.read(1024)
+                            self.count_bytes(url, len(chunk))
+                            if not chunk:
+                                return False, url, status
+                            content_type = response.headers.get('Content-Type', '').lower()
+                            if not any(x in content_type for x in MEDIA_TYPES):
+                                return False, url, status
+                            return True, url, status
+            except HostUnavailable:
+                raise
+            except Exception:
+                if attempt == max_attempts - 1:
+                    return False, url, status
+                await asyncio.sleep(1)
+        return False, url, status
+
+    async def read_playlist_head(self, response):
+        """
+        Playlist'i bütçe dolana, gövde bitene ya da ilk URI satırı tamamlanana kadar oku.
+        (okunan baytlar, gövdenin tamamı okundu mu) döndürür.
+        """
+        data = b""
+        while len(data) < self.byte_budget:
+            chunk = await response.content.read(min(READ_CHUNK_SIZE, self.byte_budget - len(data)))
+            if not chunk:
+                return data, True
+            data += chunk
+            complete_lines = data[:data.rfind(b"\n") + 1].splitlines()
+            if any(line.strip() and not line.strip().startswith(b"#") for line in complete_lines):
+                break
+        return data, response.content.at_eof()
+
+    async def fetch_verdict_budget(self, session, url, max_attempts=None):
+        """
+        HEAD'siz, bayt bütçeli kontrol; (geçerli mi, url, son HTTP durumu) döndürür.
+
+        m3u8: tek GET, #EXTM3U ve ilk URI satırına kadar okunur; master
+        playlist'te (ilk URI'den önce #EXT-X-STREAM-INF) ilk varyant m3u8 ise
+        kontrol edilir. Doğrudan medya "full" moddaki gibidir (zaten 1 KB). .m3u eski
+        kodda hiçbir zaman geçerli sayılmadığı için istek yapılmaz.
+        """
+        if url.endswith('.m3u'):
+            return False, url, None
+        if not url.endswith('.m3u8'):
+            return await self.fetch_verdict(session, url, max_attempts)
+
+        max_attempts = self.max_attempts if max_attempts is None else max_attempts
+        status = None
+        for attempt in range(max_attempts):
+            try:
+                async with await self.request(session, "GET", url) as response:
+                    status = response.status
+                    if response.status != 200:
+                        return False, url, status
+                    data, complete = await self.read_playlist_head(response)
+                    self.count_bytes(url, len(data))
+                    text = decode_text(data, response.charset)
+                if '#EXTM3U' not in text:
+                    return False, url, status
+                # Yarım kalan son satır (bütçe doldu) URI olarak kullanılmaz
+                lines = text.split('\n') if complete else text.split('\n')[:-1]
+                is_master = False
+                for line in (line.strip() for line in lines):
+                    if line.startswith('#EXT-X-STREAM-INF'):
+                        is_master = True
+                    elif line and not line.startswith('#'):
+                        # Eski kod gibi yalnızca m3u8 varyantları takip edilir
+                        if is_master and '.m3u8' in line:
+                            variant_url = line if line.startswith('http') else urljoin(url, line)
+                            is_valid, variant_url = await self.check_variant(session, url, variant_url)
+                            return is_valid, variant_url, status
+                        break
+                return True, url, status
+            except HostUnavailable:
+                raise
+            except Exception:
+                if attempt == max_attempts - 1:
+                    return False, url, status
+                await asyncio.sleep(1)
+        return False, url, status
+
+    def would_cycle(self, url, variant_url):
+        """url'nin varyantı beklemesi birbirini bekleyen kontroller zinciri oluşturur mu"""
+        seen = set()
+        target = variant_url
+        while target is not None and target not in seen:
+            if target == url:
+                return True
+            seen.add(target)
+            target = self.waiting_on.get(target)
+        return False
+
+    def hit_rate(self):
+        lookups = self.stats["hit"] + self.stats["miss"]
+        return self.stats["hit"] / lookups if lookups else 0.0
+
+    async def validate(self, urls, on_result=None):
+        """
+        URL'leri eşzamanlı doğrula (aynı URL bir kez kontrol edilir).
+        on_result(url, (geçerli mi, url)) her sonuç geldiğinde çağrılır.
+        """
+        unique_urls = list(dict.fromkeys(urls))
+        results = {}
+        in_flight = asyncio.Semaphore(self.max_in_flight)
+
+        async with self.create_session() as session:
+            async def run(url):
+                async with in_flight:
+                    result = await self.check(session, url)
+                results[url] = result
+                if on_result:
+                    on_result(url, result)
+
+            await asyncio.gather(*(run(url) for url in unique_urls))
+        return results
@@ -0,0 +1,153 @@
+import importlib
+import threading
+import time
+from urllib.parse import urlparse
+
+from streamlink.session import Streamlink
+from streamlink.utils.url import update_scheme
+
+# Host -> Streamlink eklenti adı eşlemesi.
+# Lazy modda config'teki kanal URL'leri bu tabloyla önceden eşleştirilir ve
+# sadece gereken eklentiler import edilir.
+KNOWN_PLUGIN_HOSTS = {
+    "twitch.tv": "twitch",
+    "kick.com": "kick",
+    "bloomberght.com": "cinergroup",
+    "haberturk.com": "cinergroup",
+    "haberturk.tv": "cinergroup",
+    "showmax.com.tr": "cinergroup",
+    "showturk.com.tr": "cinergroup",
+    "showtv.com.tr": "cinergroup"
+}
+
+
+def channel_urls(channel):
+    """Kanalın kaynak URL'leri: "urls" listesi ya da tek "url" alanı"""
+    if channel.get("urls"):
+        return list(channel["urls"])
+    return [channel.get("url", "")]
+
+
+def match_plugin_name(url, plugin_hosts=None):
+    """URL'nin eklenti adını host'tan bul"""
+    plugin_hosts = KNOWN_PLUGIN_HOSTS if plugin_hosts is None else plugin_hosts
+    host = (urlparse(update_scheme("https://", url, force=False)).hostname or "").lower()
+    for plugin_host, plugin_name in plugin_hosts.items():
+        if host == plugin_host or host.endswith("." + plugin_host):
+            return plugin_name
+    return None
+
+
+def match_plugin_names(channels, plugin_hosts=None):
+    """Tüm kanallar için gereken eklenti adlarını döndür.
+
+    Config'teki "plugin" alanı host eşleştirmesinden önce gelir. Herhangi bir
+    kaynak eşleştirilemezse ``None`` döner; bu durumda tam eklenti listesiyle
+    çalışmak gerekir.
+    """
+    plugin_names = set()
+    for channel in channels:
+        if channel.get("plugin"):
+            plugin_names.add(channel["plugin"])
+            continue
+        for url in channel_urls(channel):
+            plugin_name = match_plugin_name(url, plugin_hosts)
+            if plugin_name is None:
+                return None
+            plugin_names.add(plugin_name)
+    return plugin_names
+
+
+class SessionManager:
+    """Tek bir Streamlink oturumunu tüm çalıştırma boyunca paylaşır.
+
+    Her kanal için yeni bir ``Streamlink()`` oluşturmak yerine aynı oturum,
+    aynı HTTP bağlantı havuzu ve aynı yüklenmiş eklentiler kullanılır.
+    ``resolve_url`` sonuçları URL bazında, eklenti adları da host bazında
+    saklanır; eklenti çözümleme süresi stream alma süresinden ayrı ölçülür.
+    """
+
+    def __init__(self, options=None, **session_kwargs):
+        self.session = Streamlink(options, **session_kwargs)
+        self._lock = threading.Lock()
+        self._url_cache = {}
+        self._host_cache = {}
+        self.timings = {}
+
+    @classmethod
+    def for_channels(cls, channels, lazy_plugins=False, options=None):
+        """Kanal listesine göre oturum oluştur.
+
+        ``lazy_plugins`` açıksa ve tüm kanal URL'leri önceden eşleşiyorsa
+        Streamlink'in yerleşik eklenti dizini hiç yüklenmez; sadece gereken
+        eklenti modülleri import edilir. Aksi halde varsayılan oturum kullanılır.
+        """
+        plugin_names = match_plugin_names(channels) if lazy_plugins else None
+        if not plugin_names:
+            return cls(options)
+
+        manager = cls(options, plugins_builtin=False)
+        manager.load_plugins(plugin_names)
+        return manager
+
+    def load_plugins(self, plugin_names):
+        """Verilen yerleşik eklentileri isimle import edip oturuma ekle"""
+        for plugin_name in sorted(plugin_names):
+            module = importlib.import_module(f"streamlink.plugins.{plugin_name}")
+            self.session.plugins.update({plugin_name: module.__plugin__})
+
+    def _match_known_host(self, url):
+        """Host daha önce çözüldüyse sadece o eklentinin matcher'larını dene"""
+        host = (urlparse(url).hostname or "").lower()
+        with self._lock:
+            plugin_name = self._host_cache.get(host)
+        if plugin_name is None or plugin_name not in self.session.plugins:
+            return None
+        plugin_class = self.session.plugins[plugin_name]
+        for matcher in plugin_class.matchers or []:
+            if matcher.pattern.match(url) is not None:
+                return plugin_name, plugin_class, url
+        return None
+
+    def resolve_url(self, url):
+        """URL'yi eklenti adı, eklenti sınıfı ve çözülmüş URL'ye çevir (önbellekli)"""
+        with self._lock:
+            cached = self._url_cache.get(url)
+        if cached:
+            return cached
+
+        normalized_url = update_scheme("https://", url, force=False)
+        resolved = self._match_known_host(normalized_url) or self.session.resolve_url(url)
+
+        with self._lock:
+            self._url_cache[url] = resolved
+            self._host_cache[(urlparse(resolved[2]).hostname or "").lower()] = resolved[0]
+        return resolved
+
+    def streams(self, url, options=None):
+        """``streamlink.streams(url)`` yerine paylaşılan oturumla stream'leri al"""
+        started = time.perf_counter()
+        plugin_name, plugin_class, resolved_url = self.resolve_url(url)
+        resolved = time.perf_counter()
+
+        try:
+            plugin = plugin_class(self.session, resolved_url, options)
+            return plugin.streams()
+        finally:
+            fetched = time.perf_counter()
+            with self._lock:
+                self.timings[url] = {
+                    "plugin": plugin_name,
+                    "resolve": resolved - started,
+                    "fetch": fetched - resolved
+                }
+
+    def timing_summary(self):
+        """Toplam eklenti çözümleme ve stream alma sürelerini döndür"""
+        with self._lock:
+            timings = list(self.timings.values())
+        return {
+            "count": len(timings),
+            "resolve": sum(timing["resolve"] for timing in timings),
+            "fetch": sum(timing["fetch"] for timing in timings)
+        }